@@ -2,35 +2,65 @@
 # This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
 # You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/.
 import tkinter as tk
-from tkinter import messagebox, font as tkfont
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import cm
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
+from tkinter import messagebox, filedialog, font as tkfont
 from datetime import datetime
-import qrcode
+from concurrent.futures import ProcessPoolExecutor
 import os
 import shutil
+import csv
+import hashlib
 import json
+import multiprocessing
+import sqlite3
+import threading
+import time
 import traceback
 
-# Google Sheets imports
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+from queue_store import atomic_write
+from sheets_client import get_client, quote_tab, api_calls, SheetsError, SENTINEL_CELLS, SENTINEL_ROW_COUNT
+from token_allocator import TokenAllocator, allocator_file
 
-# ----------------- Configuration files -----------------
-SHEETS_ID_FILE = "sheetsid.txt"
-SERVICE_ACCOUNT_FILE = "service_account.json"
+DESK_NAME = "Desk 1"  # Change per desk if needed (desks running from one shared folder need different names)
 
+# ----------------- Configuration files -----------------
 TICKET_FOLDER = "Tickets"
 CONFIG_FOLDER = "config"
-DATE_TRACK_FILE = os.path.join(CONFIG_FOLDER, "last_ticket_date.txt")
+# state that belongs to this desk only, so several desks can run from one shared folder
+DESK_FOLDER = os.path.join(CONFIG_FOLDER, "".join(c if c.isalnum() or c in " -_" else "_" for c in DESK_NAME).strip() or "desk")
+DATE_TRACK_FILE = os.path.join(DESK_FOLDER, "last_ticket_date.txt")
+TICKET_COUNTER_FILE = os.path.join(DESK_FOLDER, "ticket_counter.json")  # this desk's last entry number and lease
+OUTBOX_FILE = os.path.join(DESK_FOLDER, "sheets_outbox.db")  # this desk's registrations not yet written to Sheets
+OUTBOX_RETRY_MAX = 60  # seconds between retries at most while Sheets is unreachable
+OUTBOX_STATUS_MS = 1000  # how often the window refreshes the upload status line
+OUTBOX_BATCH_WINDOW = 0.5  # seconds to wait for more registrations before uploading
+OUTBOX_BATCH_ROWS = 50  # rows sent in one append at most (uploads start at once when this many are waiting)
+OUTBOX_PARK_AFTER = 3  # times Sheets may reject a row on its own (HTTP 400) before it is set aside so later rows can go
+ALLOCATOR_CHECK_SECONDS = 3  # how often the desk checks (in the background) whether the day's numbering was reset
+IMPORT_FOLDER = os.path.join(DESK_FOLDER, "imports")  # progress of bulk imports, so they can be resumed
+
+# reportlab, qrcode and PIL are imported when the first pass is made, not at startup
+CM = 72 / 2.54  # points per cm (reportlab.lib.units.cm)
+TICKET_SIZE = (8 * CM, 8 * CM)
+QR_BOX_SIZE = 4  # pixels per QR module; ~200 dpi at the printed 70 pt size
+QR_MASK_PATTERN = None  # None lets qrcode pick the best of eight masks; 0-7 fixes one (~4x faster, test your scanners first)
 
-os.makedirs(CONFIG_FOLDER, exist_ok=True)
+os.makedirs(DESK_FOLDER, exist_ok=True)
 os.makedirs(TICKET_FOLDER, exist_ok=True)
 
 # ----------------- Utilities -----------------
+def move_legacy_desk_files():
+    """Moves state kept directly in config/ by older versions into this desk's folder (once)."""
+    names = ["last_ticket_date.txt", "ticket_counter.json", "sheets_outbox.db",
+             "sheets_outbox.db-wal", "sheets_outbox.db-shm", "imports"]
+    for name in names:
+        old_path, new_path = os.path.join(CONFIG_FOLDER, name), os.path.join(DESK_FOLDER, name)
+        if os.path.exists(old_path) and not os.path.exists(new_path):
+            try:
+                os.replace(old_path, new_path)
+                print(f"Moved {old_path} to {new_path}")
+            except OSError as e:
+                print(f"Could not move {old_path} to {new_path}:", e)
+
 def pick_preferred_font(root):
     preferred_fonts = ["Montserrat", "Aptos", "Segoe UI", "Helvetica", "Arial"]
     try:
@@ -43,6 +73,9 @@ def pick_preferred_font(root):
     return "TkDefaultFont"
 
 def register_pdf_font():
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
     possible_fonts = [
         ("Montserrat", "C:\\Windows\\Fonts\\Montserrat-Regular.ttf"),
         ("Aptos", "C:\\Windows\\Fonts\\Aptos.ttf"),
@@ -56,111 +89,710 @@ def register_pdf_font():
                 pass
     return "Helvetica"
 
-def read_sheet_id():
-    if not os.path.exists(SHEETS_ID_FILE):
-        raise FileNotFoundError(f"{SHEETS_ID_FILE} not found. Create it with your Google Sheet ID.")
-    with open(SHEETS_ID_FILE, "r", encoding="utf-8") as f:
-        return f.read().strip()
+def make_qr_image(text):
+    """QR code for text as a PIL image, built in memory."""
+    import qrcode
+
+    qr = None
+    if QR_MASK_PATTERN is not None:
+        try:
+            qr = qrcode.QRCode(box_size=QR_BOX_SIZE, border=4, mask_pattern=QR_MASK_PATTERN)
+        except TypeError:
+            pass  # qrcode before 7.4 has no mask_pattern
+    if qr is None:
+        qr = qrcode.QRCode(box_size=QR_BOX_SIZE, border=4)
+    qr.add_data(text)
+    qr.make(fit=True)
+    return qr.make_image().get_image()
+
+def new_ticket_canvas(path):
+    from reportlab.pdfgen import canvas
+
+    return canvas.Canvas(path, pagesize=TICKET_SIZE)
+
+def draw_ticket_page(c, font, name, contact_number, entry_no, date, day, time_str):
+    """Draws one entry pass on canvas c (from new_ticket_canvas) and finishes the page."""
+    from reportlab.lib.utils import ImageReader
+
+    width, height = TICKET_SIZE
+    qr_text = f"Entry No: {entry_no}\nName: {name}\nContact: {contact_number}\nDate: {date} ({day})\nTime: {time_str}"
+
+    c.setFont(font, 16)
+    c.setFillColorRGB(0, 0, 0)
+    c.drawCentredString(width / 2, height - 30, "KTech")
+
+    c.setFont(font, 10)
+    c.drawCentredString(width / 2, height - 50, f"{date} ({day}) | {time_str}")
+
+    c.setFont(font, 10)
+    c.drawString(20, height - 80, f"Name: {name}")
+    c.drawString(20, height - 110, f"Number: {contact_number}")
+    c.drawString(20, height - 140, f"Entry No: {entry_no}")
+
+    c.drawImage(ImageReader(make_qr_image(qr_text)), width - 90, 20, width=70, height=70)
+
+    c.setFont(font, 8)
+    c.drawCentredString(width / 2, 10, "Scan for interview info")
+
+    c.showPage()
+
+def read_ticket_counter(date_str):
+    """
+    This desk's (last entry number, current lease) on date_str, or None when the counter file
+    is missing or from another day. The lease is a dict with id, next, last and generation, or None.
+    """
+    try:
+        with open(TICKET_COUNTER_FILE, "r", encoding="utf-8") as f:
+            counter = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(counter, dict) or counter.get("date") != date_str:
+        return None
+    try:
+        lease = counter.get("lease")
+        if lease is not None:
+            lease = {"id": int(lease["id"]), "next": int(lease["next"]), "last": int(lease["last"]),
+                     # counter files from before reset generations: the lease is renewed once
+                     "generation": int(lease.get("generation", -1))}
+        return int(counter.get("ticket_number", 0)), lease
+    except (TypeError, ValueError, KeyError):
+        return None
+
+def save_ticket_counter(date_str, ticket_number, lease=None):
+    # written before the entry is used, so a crash can skip a number but never reuse one
+    counter = {"date": date_str, "ticket_number": ticket_number, "lease": lease}
+    atomic_write(TICKET_COUNTER_FILE, json.dumps(counter).encode("utf-8"))
 
 # ----------------- Google Sheets Handler -----------------
 class SheetsHandler:
-    SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
-
     def __init__(self):
-        self.sheet_id = read_sheet_id()
-        if not os.path.exists(SERVICE_ACCOUNT_FILE):
-            raise FileNotFoundError(f"{SERVICE_ACCOUNT_FILE} not found. Place your service account JSON file in the project folder.")
-        creds = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=self.SCOPES)
-        self.service = build("sheets", "v4", credentials=creds)
-        self.spreadsheet = None
+        # the process-wide pooled client (see sheets_client.py)
+        self.client = get_client()
+        # tab titles, loaded once and kept up to date by this handler; call invalidate_titles()
+        # if tabs may have been added or removed elsewhere
+        self.sheet_titles = None
+        self.sentinel_checked = set()  # tabs whose sentinel cells (revision, row count) are known to be there
+        # the client itself is thread-safe; this lock keeps the title cache consistent, and OutboxWorker
+        # holds it (never across a request) while it picks rows and records the result, as a counter reset does
+        self.lock = threading.RLock()
         # load spreadsheet metadata
         self._load_spreadsheet()
 
     def _load_spreadsheet(self):
+        # only the tab titles; the full metadata grows with every daily tab
         try:
-            self.spreadsheet = self.service.spreadsheets().get(spreadsheetId=self.sheet_id).execute()
-        except HttpError as e:
+            with self.lock:
+                self.sheet_titles = set(self.client.sheet_titles())
+        except SheetsError as e:
             raise RuntimeError(f"Error loading spreadsheet: {e}")
 
+    def invalidate_titles(self):
+        with self.lock:
+            self.sheet_titles = None
+
     def sheet_exists(self, title):
-        sheets = self.spreadsheet.get("sheets", [])
-        for s in sheets:
-            props = s.get("properties", {})
-            if props.get("title") == title:
-                return True
-        return False
+        with self.lock:
+            if self.sheet_titles is None:
+                self._load_spreadsheet()
+            return title in self.sheet_titles
 
     def create_daily_sheet_if_missing(self, title):
-        # refresh metadata
-        self._load_spreadsheet()
-        if self.sheet_exists(title):
-            return
-        requests = [
-            {"addSheet": {"properties": {"title": title, "gridProperties": {"rowCount": 1000, "columnCount": 10}}}}
-        ]
-        try:
-            body = {"requests": requests}
-            self.service.spreadsheets().batchUpdate(spreadsheetId=self.sheet_id, body=body).execute()
-            # set header row
-            header = [["Date", "Day", "Time", "Candidate Name", "Contact Number", "Entry No"]]
-            self.service.spreadsheets().values().update(
-                spreadsheetId=self.sheet_id,
-                range=f"'{title}'!A1:F1",
-                valueInputOption="USER_ENTERED",
-                body={"values": header}
-            ).execute()
-            # reload metadata
-            self._load_spreadsheet()
-        except HttpError as e:
-            raise RuntimeError(f"Error creating daily sheet: {e}")
-
-    def get_today_rows(self, title):
+        with self.lock:
+            if self.sheet_exists(title):
+                self.ensure_sentinel(title)
+                return
+            try:
+                try:
+                    self.client.add_tab(title, rows=1000, columns=10)
+                except SheetsError:
+                    # another desk may have added the tab since the titles were loaded
+                    self.invalidate_titles()
+                    if self.sheet_exists(title):
+                        self.ensure_sentinel(title)
+                        return
+                    raise
+                self.sheet_titles.add(title)
+                # header row, plus the sentinel cells readers check before downloading the rows
+                header = [["Date", "Day", "Time", "Candidate Name", "Contact Number", "Entry No", "", 1, SENTINEL_ROW_COUNT]]
+                self.client.update_values(f"{quote_tab(title)}!A1:I1", header)
+                self.sentinel_checked.add(title)
+            except SheetsError as e:
+                raise RuntimeError(f"Error creating daily sheet: {e}")
+
+    def ensure_sentinel(self, title):
+        """Adds the revision / row-count cells to a tab made without them (checked once per tab)."""
+        with self.lock:
+            if title in self.sentinel_checked:
+                return
+            try:
+                cells = self.client.get_values(f"{quote_tab(title)}!{SENTINEL_CELLS}")
+                row = cells[0] if cells else []
+                if len(row) < 2 or not row[1]:
+                    revision = row[0] if row and row[0].strip().isdigit() else 1
+                    self.client.update_values(f"{quote_tab(title)}!{SENTINEL_CELLS}", [[revision, SENTINEL_ROW_COUNT]])
+                self.sentinel_checked.add(title)
+            except SheetsError as e:
+                # readers then simply download the whole tab each time
+                print("Could not add the sentinel cells:", e)
+
+    def bump_revision(self, title):
+        """Tells readers the rows changed in a way the row count may not show (e.g. cleared and refilled)."""
+        cells = self.client.get_values(f"{quote_tab(title)}!{SENTINEL_CELLS}")
+        row = cells[0] if cells else []
+        revision = int(row[0]) + 1 if row and row[0].strip().isdigit() else 1
+        self.client.update_values(f"{quote_tab(title)}!{SENTINEL_CELLS}", [[revision, SENTINEL_ROW_COUNT]])
+
+    def get_entry_numbers(self, title):
+        """Entry numbers already in a sheet's F column (raises if the sheet can't be read)."""
         try:
-            res = self.service.spreadsheets().values().get(spreadsheetId=self.sheet_id, range=f"'{title}'!A:F").execute()
-            return res.get("values", [])
-        except HttpError:
-            return []
+            rows = self.client.get_values(f"{quote_tab(title)}!F2:F")
+        except SheetsError as e:
+            raise SheetsError(f"Error reading entry numbers: {e}", e.status)
+        return {int(r[0]) for r in rows if r and r[0].strip().isdigit()}
 
-    def append_row(self, title, row_values):
+    def append_rows(self, title, rows):
+        """Appends several rows in one request; they land in the order given."""
         try:
-            self.service.spreadsheets().values().append(
-                spreadsheetId=self.sheet_id,
-                range=f"'{title}'!A:F",
-                valueInputOption="USER_ENTERED",
-                insertDataOption="INSERT_ROWS",
-                body={"values": [row_values]}
-            ).execute()
-        except HttpError as e:
-            raise RuntimeError(f"Error appending row: {e}")
+            self.client.append_rows(f"{quote_tab(title)}!A:F", rows)
+        except SheetsError as e:
+            # keeps the HTTP status, so the outbox can tell a rejected row from an outage
+            raise SheetsError(f"Error appending rows: {e}", e.status)
 
     def clear_daily_rows(self, title):
         try:
             # clear from row 2 onwards (keep header)
-            self.service.spreadsheets().values().clear(
-                spreadsheetId=self.sheet_id,
-                range=f"'{title}'!A2:F"
-            ).execute()
-        except HttpError as e:
+            self.client.clear_values(f"{quote_tab(title)}!A2:F")
+            self.bump_revision(title)
+        except SheetsError as e:
             raise RuntimeError(f"Error clearing sheet: {e}")
 
-    def get_last_ticket_number(self, title, today_date_str):
-        rows = self.get_today_rows(title)
-        # first row is header; check rows starting from index 1
-        if not rows or len(rows) <= 1:
-            return 0
-        count = 0
-        for r in rows[1:]:
-            # A column is Date
-            if len(r) >= 1 and r[0] == today_date_str:
-                count += 1
-        return count
+    def get_last_ticket_number(self, title):
+        # highest entry number rather than a row count, so deleted rows don't cause reuse
+        return max(self.get_entry_numbers(title), default=0)
+
+# ----------------- Sheets Outbox -----------------
+class SheetsOutbox:
+    """
+    Registrations waiting to be written to Google Sheets, kept in a local SQLite file
+    so a pass can be issued (and survives a restart) before Sheets has seen the row.
+    Rows are sent oldest first by OutboxWorker, several per request, and deleted once Sheets has them.
+    A row Sheets keeps rejecting is parked: kept, but skipped until someone asks to try it again.
+    Each row carries the allocator's reset generation its entry number was issued under (see drop_stale).
+    A counter reset also waits here (table clears) until the worker has cleared the sheet's rows on Sheets.
+    """
+
+    def __init__(self, path=OUTBOX_FILE):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " sheet TEXT NOT NULL,"
+            " entry_no INTEGER NOT NULL,"
+            " row_json TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " last_error TEXT,"
+            " created_at TEXT NOT NULL)"
+        )
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(outbox)")}
+        if "rejections" not in columns:
+            # outbox files from before parking was added
+            self.conn.execute("ALTER TABLE outbox ADD COLUMN rejections INTEGER NOT NULL DEFAULT 0")
+            self.conn.execute("ALTER TABLE outbox ADD COLUMN parked INTEGER NOT NULL DEFAULT 0")
+        if "generation" not in columns:
+            self.conn.execute("ALTER TABLE outbox ADD COLUMN generation INTEGER NOT NULL DEFAULT 0")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS imports (job_id TEXT PRIMARY KEY, queued_at TEXT NOT NULL)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS clears ("
+            " sheet TEXT PRIMARY KEY,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " last_error TEXT,"
+            " requested_at TEXT NOT NULL)"
+        )
+
+    def add(self, sheet, entry_no, row_values, generation=0):
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO outbox (sheet, entry_no, row_json, generation, created_at) VALUES (?, ?, ?, ?, ?)",
+                (sheet, entry_no, json.dumps(row_values), generation, datetime.now().isoformat(timespec="seconds")),
+            )
+
+    def add_import(self, job_id, sheet, rows, generation=0):
+        """
+        Queues the rows [(entry_no, row_values), ...] of a bulk import in one transaction.
+        Returns False (and queues nothing) if job_id was queued before.
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self.conn.execute("SELECT 1 FROM imports WHERE job_id = ?", (job_id,)).fetchone():
+                    self.conn.execute("ROLLBACK")
+                    return False
+                self.conn.executemany(
+                    "INSERT INTO outbox (sheet, entry_no, row_json, generation, created_at) VALUES (?, ?, ?, ?, ?)",
+                    [(sheet, entry_no, json.dumps(values), generation, now) for entry_no, values in rows]
+                )
+                self.conn.execute("INSERT INTO imports (job_id, queued_at) VALUES (?, ?)", (job_id, now))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return True
+
+    def next_batch(self, limit):
+        """
+        Up to limit of the oldest unsent rows as dicts, all for the same sheet (the oldest row's),
+        or an empty list when everything has been sent. Parked rows are skipped.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, sheet, entry_no, row_json, attempts, generation FROM outbox WHERE parked = 0 "
+                "ORDER BY id LIMIT ?",
+                (limit,)
+            ).fetchall()
+        batch = []
+        for row in rows:
+            if row[1] != rows[0][1]:
+                break
+            batch.append({"id": row[0], "sheet": row[1], "entry_no": row[2], "values": json.loads(row[3]),
+                          "attempts": row[4], "generation": row[5]})
+        return batch
+
+    def pending_count(self):
+        """Rows waiting to be sent (parked rows not included)."""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM outbox WHERE parked = 0").fetchone()[0]
+
+    def mark_sent(self, row_ids):
+        with self.lock:
+            self.conn.executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in row_ids])
+
+    def mark_failed(self, row_ids, error, rejected=False):
+        """
+        Records a failed send. rejected means Sheets refused these rows themselves (not an outage);
+        a row rejected OUTBOX_PARK_AFTER times is parked. Returns the number of rows parked.
+        """
+        with self.lock:
+            self.conn.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, last_error = ?, rejections = rejections + ?, "
+                "parked = (rejections + ? >= ?) WHERE id = ?",
+                [(str(error), int(rejected), int(rejected), OUTBOX_PARK_AFTER, i) for i in row_ids]
+            )
+            return self.conn.execute(
+                f"SELECT COUNT(*) FROM outbox WHERE parked = 1 AND id IN ({','.join('?' * len(row_ids))})", row_ids
+            ).fetchone()[0]
+
+    def unpark(self):
+        """Puts parked rows back in line (e.g. after the sheet was fixed by hand); returns how many."""
+        with self.lock:
+            return self.conn.execute("UPDATE outbox SET parked = 0, rejections = 0 WHERE parked = 1").rowcount
+
+    def forget_import(self, job_id):
+        """Lets job_id be queued again (its entry numbers were reset)."""
+        with self.lock:
+            self.conn.execute("DELETE FROM imports WHERE job_id = ?", (job_id,))
+
+    def drop_stale(self, sheet, generation):
+        """
+        Drops the sheet's unsent rows issued before the allocator's reset generation (numbers handed out
+        on this desk before another desk reset the day); returns how many were dropped.
+        """
+        with self.lock:
+            return self.conn.execute(
+                "DELETE FROM outbox WHERE sheet = ? AND generation < ?", (sheet, generation)
+            ).rowcount
+
+    def reset_sheet(self, sheet):
+        """Drops the sheet's unsent rows and queues clearing its rows on Sheets (a counter reset)."""
+        now = datetime.now().isoformat(timespec="seconds")
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute("DELETE FROM outbox WHERE sheet = ?", (sheet,))
+                self.conn.execute(
+                    "INSERT INTO clears (sheet, requested_at) VALUES (?, ?) "
+                    "ON CONFLICT(sheet) DO UPDATE SET attempts = 0, last_error = NULL, requested_at = excluded.requested_at",
+                    (sheet, now)
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def next_clear(self):
+        """(sheet, attempts) of the oldest clear still to be done, or None."""
+        with self.lock:
+            return self.conn.execute("SELECT sheet, attempts FROM clears ORDER BY requested_at LIMIT 1").fetchone()
+
+    def mark_cleared(self, sheet):
+        with self.lock:
+            self.conn.execute("DELETE FROM clears WHERE sheet = ?", (sheet,))
+
+    def mark_clear_failed(self, sheet, error):
+        with self.lock:
+            self.conn.execute("UPDATE clears SET attempts = attempts + 1, last_error = ? WHERE sheet = ?",
+                              (str(error), sheet))
+
+    def last_entry_no(self, sheet):
+        with self.lock:
+            row = self.conn.execute("SELECT MAX(entry_no) FROM outbox WHERE sheet = ?", (sheet,)).fetchone()
+        return row[0] or 0
+
+    def status(self):
+        """
+        (rows waiting, rows whose last attempt failed, last error message, sheets waiting to be cleared,
+        parked rows); the error is the parked rows' when nothing else failed.
+        """
+        with self.lock:
+            pending, failed, parked = self.conn.execute(
+                "SELECT COALESCE(SUM(parked = 0), 0), COALESCE(SUM(parked = 0 AND attempts > 0), 0), "
+                "COALESCE(SUM(parked), 0) FROM outbox"
+            ).fetchone()
+            clearing, clear_error = self.conn.execute(
+                "SELECT COUNT(*), MAX(last_error) FROM clears"
+            ).fetchone()
+            row = self.conn.execute(
+                "SELECT last_error FROM outbox WHERE attempts > 0 ORDER BY parked, id LIMIT 1"
+            ).fetchone()
+        return pending, failed, clear_error or (row[0] if row else None), clearing, parked
+
+
+class OutboxWorker(threading.Thread):
+    """
+    Sends outbox rows to Sheets in order, retrying with a growing delay while Sheets can't be reached.
+    Registrations made within OUTBOX_BATCH_WINDOW of each other go up as one multi-row append.
+    A failed batch is retried in halves, so one bad row can't hold back the rows around it for long:
+    once Sheets has rejected it on its own OUTBOX_PARK_AFTER times it is parked and the rows after it go on.
+    Sheets cleared by a counter reset are cleared here too, before any newer row is sent. With an
+    allocator file, rows issued before a reset on another desk are dropped instead of sent, since
+    their numbers are being handed out again.
+    """
+
+    def __init__(self, sheets, outbox, allocator_path=None):
+        super().__init__(daemon=True)
+        self.sheets = sheets
+        self.outbox = outbox
+        self.allocator_path = allocator_path
+        self.allocator = None  # opened in the worker thread (SQLite connections stay in their thread)
+        self.wakeup = threading.Event()
+        self.batch_limit = OUTBOX_BATCH_ROWS
+        self.retry_at = 0.0  # time.monotonic() before which a failed send isn't retried
+        self.generation = 0  # bumped by reset_sheet(); results of a send started before a reset are dropped
+
+    def wake(self):
+        """New rows are waiting; sent at once unless the worker is waiting to retry a failed send."""
+        self.wakeup.set()
+
+    def retry_now(self):
+        """Skips the wait before the next retry, and gives parked rows another chance."""
+        self.outbox.unpark()
+        self.retry_at = 0.0
+        self.wakeup.set()
+
+    def reset_sheet(self, sheet):
+        """Counter reset: drops the sheet's unsent rows and clears its rows on Sheets in the background."""
+        with self.sheets.lock:
+            self.generation += 1
+            self.outbox.reset_sheet(sheet)
+        self.retry_now()
+
+    def run(self):
+        if self.allocator_path:
+            try:
+                self.allocator = TokenAllocator(self.allocator_path)
+            except Exception as e:
+                print("Outbox: could not open the entry-number allocator:", e)
+        while True:
+            self.wakeup.clear()
+            backoff = self.retry_at - time.monotonic()
+            if backoff > 0:
+                self.wakeup.wait(timeout=backoff)
+                continue
+            self.collect()
+            delay = self.flush()
+            if delay is None:
+                self.wakeup.wait()
+            else:
+                self.retry_at = time.monotonic() + delay
+
+    def collect(self):
+        """Gives a burst of registrations OUTBOX_BATCH_WINDOW seconds to arrive before uploading."""
+        deadline = time.monotonic() + OUTBOX_BATCH_WINDOW
+        while 0 < self.outbox.pending_count() < OUTBOX_BATCH_ROWS:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            self.wakeup.wait(timeout=remaining)
+            self.wakeup.clear()
+
+    def flush(self):
+        """
+        Clears reset sheets, then sends rows until the outbox is empty (returns None) or a request fails
+        (returns the retry delay). The Sheets lock is held while picking the work and recording the result,
+        never during a request, so a reset on the window's thread doesn't wait for Sheets.
+        """
+        while True:
+            with self.sheets.lock:
+                generation = self.generation
+                clear = self.outbox.next_clear()
+                batch = [] if clear else self.outbox.next_batch(self.batch_limit)
+            if clear:
+                sheet, attempts = clear
+                try:
+                    self.sheets.clear_daily_rows(sheet)
+                except Exception as e:
+                    print(f"Outbox: could not clear {sheet}:", e)
+                    self.outbox.mark_clear_failed(sheet, e)
+                    return min(OUTBOX_RETRY_MAX, 2 ** (attempts + 1))
+                with self.sheets.lock:
+                    # reset again while clearing: clear once more, rows may have been sent in between
+                    if generation == self.generation:
+                        self.outbox.mark_cleared(sheet)
+                continue
+            if not batch:
+                return None
+            sheet = batch[0]["sheet"]
+            if self.allocator is not None:
+                try:
+                    current = self.allocator.generation(sheet)
+                except Exception as e:
+                    print("Outbox: could not check the entry-number allocator:", e)
+                    current = 0
+                if any(row["generation"] < current for row in batch):
+                    with self.sheets.lock:
+                        dropped = self.outbox.drop_stale(sheet, current)
+                    print(f"Outbox: dropped {dropped} entries issued before the counter was reset on another desk")
+                    continue
+            error = None
+            try:
+                to_send = batch
+                if any(row["attempts"] for row in batch):
+                    # an earlier attempt may have reached Sheets even though it reported an error
+                    present = self.sheets.get_entry_numbers(sheet)
+                    to_send = [row for row in batch if row["entry_no"] not in present]
+                if to_send:
+                    self.sheets.append_rows(sheet, [row["values"] for row in to_send])
+            except Exception as e:
+                error = e
+            # 400: Sheets refused the request itself; retrying the same rows later won't help
+            rejected = getattr(error, "status", None) == 400
+            with self.sheets.lock:
+                if generation != self.generation:
+                    # a reset dropped these rows while they were being sent; its clear removes them from Sheets
+                    continue
+                if error is None:
+                    self.outbox.mark_sent([row["id"] for row in batch])
+                else:
+                    # only a row sent on its own is known to be the bad one
+                    parked = self.outbox.mark_failed([row["id"] for row in batch], error, rejected and len(batch) == 1)
+            if error is not None:
+                entries = f"{batch[0]['entry_no']}" if len(batch) == 1 else f"{batch[0]['entry_no']}-{batch[-1]['entry_no']}"
+                print(f"Outbox: could not send Entry No {entries}:", error)
+                if parked:
+                    print(f"Outbox: Entry No {entries} set aside after {OUTBOX_PARK_AFTER} rejections")
+                    self.batch_limit = OUTBOX_BATCH_ROWS
+                    continue
+                self.batch_limit = max(1, len(batch) // 2)
+                if rejected:
+                    # not an outage: narrow down the bad row straight away
+                    continue
+                return min(OUTBOX_RETRY_MAX, 2 ** (batch[0]["attempts"] + 1))
+            self.batch_limit = OUTBOX_BATCH_ROWS
+
+# ----------------- Bulk Import -----------------
+def read_candidate_file(path):
+    """
+    Yields (name, contact number) from a CSV or XLSX file with a header row.
+    The name column is the first header containing "name"; the contact column the first containing
+    "contact", "phone" or "mobile". XLSX files need openpyxl (pip install openpyxl).
+    """
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        try:
+            import openpyxl
+        except ImportError:
+            raise RuntimeError("Importing .xlsx files needs openpyxl: pip install openpyxl")
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = ([("" if v is None else str(v)) for v in row] for row in workbook.active.iter_rows(values_only=True))
+            yield from _candidate_rows(rows, path)
+        finally:
+            workbook.close()
+    else:
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            yield from _candidate_rows(csv.reader(f), path)
+
+def _candidate_rows(rows, path):
+    header = [h.strip().lower() for h in next(rows, [])]
+    name_col = next((i for i, h in enumerate(header) if "name" in h), None)
+    contact_col = next((i for i, h in enumerate(header) if any(k in h for k in ("contact", "phone", "mobile"))), None)
+    if name_col is None or contact_col is None:
+        raise RuntimeError(f"{os.path.basename(path)} needs a header row with a name and a contact number column.")
+    for row in rows:
+        name = row[name_col].strip() if len(row) > name_col else ""
+        contact_number = row[contact_col].strip() if len(row) > contact_col else ""
+        if name and contact_number:
+            yield name, contact_number
+
+def ticket_pdf_name(entry_no, name, file_time):
+    return f"Entry_{entry_no}_{name.replace(' ', '_')}_{file_time}.pdf"
+
+_worker_pdf_font = None
+
+def _init_pdf_worker():
+    # fonts are registered once per worker process, not per ticket
+    global _worker_pdf_font
+    _worker_pdf_font = register_pdf_font()
+
+def render_ticket_file(job):
+    """Process-pool task: writes one entry pass PDF (via a temp file, so a half-written pass is never kept)."""
+    path, name, contact_number, entry_no, date, day, time_str = job
+    tmp_path = f"{path}.tmp"
+    c = new_ticket_canvas(tmp_path)
+    draw_ticket_page(c, _worker_pdf_font or register_pdf_font(), name, contact_number, entry_no, date, day, time_str)
+    c.save()
+    os.replace(tmp_path, path)
+    return entry_no
+
+
+class BulkImport(threading.Thread):
+    """
+    Registers every candidate in a CSV/XLSX file:
+      1. entry numbers for all of them come from one allocator lease, saved in a job file under IMPORT_FOLDER;
+      2. all rows go into the Sheets outbox in one transaction (the outbox worker uploads them in batches);
+      3. passes are rendered by a process pool; files that already exist are skipped;
+      4. optionally one merged PDF with every pass is written for bulk printing.
+    Running the same file again on the same day resumes from the first step that hasn't finished.
+    Progress is published in self.status for the window to show.
+    """
+
+    def __init__(self, source, sheet_name, outbox, outbox_worker, pdf_font, merged):
+        super().__init__(daemon=True)
+        self.source = source
+        self.sheet_name = sheet_name
+        self.outbox = outbox
+        self.outbox_worker = outbox_worker
+        self.pdf_font = pdf_font
+        self.merged = merged
+        self.status = "Reading candidate list…"
+        self.result = None  # (title, message) once finished
+        self.failed = False
+
+    def run(self):
+        try:
+            self.result = ("Bulk Import", self.import_file())
+        except Exception as e:
+            traceback.print_exc()
+            self.failed = True
+            self.result = ("Bulk Import Error", f"Import stopped: {e}\n\nRun the import again with the same file to resume.")
+
+    def import_file(self):
+        stat = os.stat(self.source)
+        job_key = f"{os.path.abspath(self.source)}|{stat.st_size}|{stat.st_mtime_ns}|{self.sheet_name}"
+        job_id = hashlib.sha1(job_key.encode("utf-8")).hexdigest()[:16]
+        os.makedirs(IMPORT_FOLDER, exist_ok=True)
+        job_file = os.path.join(IMPORT_FOLDER, f"{job_id}.json")
+
+        # 1. entry numbers, assigned once per job
+        allocator = TokenAllocator()
+        job = None
+        if os.path.exists(job_file):
+            with open(job_file, "r", encoding="utf-8") as f:
+                job = json.load(f)
+            if "lease" not in job or not allocator.is_issued(job["lease"]):
+                # the day was reset (on any desk) since this job started; its numbers are being issued again
+                forget_import_job(job_id, self.outbox)
+                job = None
+        if job is None:
+            candidates = list(read_candidate_file(self.source))
+            if not candidates:
+                return "No candidates with both a name and a contact number were found in the file."
+            now = datetime.now()
+            generation = allocator.generation(self.sheet_name)  # read before leasing, as in take_entry_number
+            lease_id, first, last = allocator.lease(self.sheet_name, f"{DESK_NAME} import", size=len(candidates))
+            allocator.release(lease_id, last + 1)
+            job = {
+                "source": self.source,
+                "sheet": self.sheet_name,
+                "lease": lease_id,
+                "generation": generation,
+                "date": now.strftime("%Y-%m-%d"),
+                "day": now.strftime("%A"),
+                "time": now.strftime("%H:%M:%S"),
+                "entries": [[first + i, name, contact] for i, (name, contact) in enumerate(candidates)],
+            }
+            atomic_write(job_file, json.dumps(job).encode("utf-8"))
+        entries = job["entries"]
+        date, day, time_str = job["date"], job["day"], job["time"]
+
+        # 2. rows for Google Sheets; the outbox records the job with the rows, so a resume never queues them twice
+        self.status = f"Queuing {len(entries)} entries for Google Sheets…"
+        self.outbox.add_import(job_id, self.sheet_name, [
+            (entry_no, [date, day, time_str, name, contact, str(entry_no)]) for entry_no, name, contact in entries
+        ], job.get("generation", 0))
+        self.outbox_worker.wake()
+
+        # 3. one PDF per pass, in parallel
+        folder_name = os.path.join(TICKET_FOLDER, f"{date} - Entries")
+        os.makedirs(folder_name, exist_ok=True)
+        file_time = time_str.replace(":", "-")
+        jobs = []
+        for entry_no, name, contact in entries:
+            path = os.path.join(folder_name, ticket_pdf_name(entry_no, name, file_time))
+            if not os.path.exists(path):
+                jobs.append((path, name, contact, entry_no, date, day, time_str))
+        done = len(entries) - len(jobs)
+        if jobs:
+            with ProcessPoolExecutor(initializer=_init_pdf_worker) as pool:
+                for _ in pool.map(render_ticket_file, jobs, chunksize=16):
+                    done += 1
+                    self.status = f"Creating passes: {done}/{len(entries)}"
+
+        # 4. everything in one file for printing
+        message = f"{len(entries)} candidates imported (Entry No {entries[0][0]}–{entries[-1][0]}).\nPasses are in {folder_name}."
+        if self.merged:
+            merged_path = os.path.join(folder_name, f"Bulk_{entries[0][0]}-{entries[-1][0]}_{file_time}.pdf")
+            if not os.path.exists(merged_path):
+                self.status = "Creating merged PDF…"
+                c = new_ticket_canvas(f"{merged_path}.tmp")
+                for entry_no, name, contact in entries:
+                    draw_ticket_page(c, self.pdf_font, name, contact, entry_no, date, day, time_str)
+                c.save()
+                os.replace(f"{merged_path}.tmp", merged_path)
+            message += f"\nAll passes for printing: {merged_path}"
+        return message
+
+def forget_import_job(job_id, outbox):
+    """Deletes a bulk import's job file and outbox record, so importing the file again starts over."""
+    try:
+        os.remove(os.path.join(IMPORT_FOLDER, f"{job_id}.json"))
+    except FileNotFoundError:
+        pass
+    outbox.forget_import(job_id)
+
+def forget_import_jobs(sheet_name, outbox):
+    """Forgets every bulk import into sheet_name (after its entries are reset)."""
+    if not os.path.isdir(IMPORT_FOLDER):
+        return
+    for file_name in os.listdir(IMPORT_FOLDER):
+        job_id, ext = os.path.splitext(file_name)
+        if ext != ".json":
+            continue
+        try:
+            with open(os.path.join(IMPORT_FOLDER, file_name), "r", encoding="utf-8") as f:
+                sheet = json.load(f).get("sheet")
+        except (OSError, ValueError):
+            sheet = None
+        if sheet in (sheet_name, None):
+            forget_import_job(job_id, outbox)
 
 # ----------------- Main App -----------------
 class InterviewCandidatePOS:
     def __init__(self, root):
         self.root = root
-        self.root.title("KTech Candidate POS")
-        self.set_window_size(420, 480)
+        self.root.title(f"KTech Candidate POS - {DESK_NAME}")
+        self.set_window_size(420, 580)
 
         self.bg_color = "#121217"
         self.fg_color = "#E0E6F1"
@@ -172,7 +804,7 @@ class InterviewCandidatePOS:
         self.root.configure(bg=self.bg_color)
 
         self.font_family = pick_preferred_font(root)
-        self.pdf_font = register_pdf_font()
+        self.pdf_font = None  # registered with the first pass (see get_pdf_font)
 
         self.today = datetime.now().strftime("%Y-%m-%d")
         # Sheets handler (lazy init; errors shown as messagebox)
@@ -190,8 +822,32 @@ class InterviewCandidatePOS:
             messagebox.showerror("Sheets Error", f"Error ensuring daily sheet:\n{e}")
             raise
 
+        # registrations are written to the local outbox first and uploaded in the background
+        try:
+            self.outbox = SheetsOutbox()
+        except Exception as e:
+            messagebox.showerror("Outbox Error", f"Could not open {OUTBOX_FILE}:\n{e}")
+            raise
+
+        # entry numbers are leased in blocks from the allocator shared by all desks
+        try:
+            self.allocator = TokenAllocator()
+        except Exception as e:
+            messagebox.showerror("Allocator Error", f"Could not open {allocator_file()}:\n{e}")
+            raise
+        self.lease = None
+        # the allocator's reset generation for today, refreshed by watch_resets()
+        self.allocator_generation = self.allocator.generation(self.today)
+        threading.Thread(target=self.watch_resets, daemon=True).start()
+
         # ticket counter logic
         self.check_and_reset_daily()
+        # entries still waiting in the outbox are not in the sheet yet
+        self.allocator.raise_floor(self.today, self.outbox.last_entry_no(self.sheet_name))
+        self.save_counter()
+
+        self.outbox_worker = OutboxWorker(self.sheets, self.outbox, self.allocator.db_file)
+        self.outbox_worker.start()
 
         # GUI setup
         self.main_frame = tk.Frame(root, bg=self.bg_color)
@@ -206,7 +862,7 @@ class InterviewCandidatePOS:
         self.button_frame = tk.Frame(self.main_frame, bg=self.bg_color, padx=20, pady=10)
         self.button_frame.grid(row=1, column=0, sticky='ew')
 
-        for i in range(6):
+        for i in range(7):
             self.input_frame.rowconfigure(i, weight=0)
         self.input_frame.columnconfigure(0, weight=0)
         self.input_frame.columnconfigure(1, weight=1)
@@ -251,6 +907,21 @@ class InterviewCandidatePOS:
         )
         self.ticket_label.grid(row=4, column=0, columnspan=2, pady=20)
 
+        self.outbox_label = tk.Label(
+            self.input_frame, text="", font=(self.font_family, 10),
+            bg=self.bg_color, fg=self.fg_color, wraplength=360, justify="center", cursor="hand2"
+        )
+        self.outbox_label.grid(row=5, column=0, columnspan=2)
+        # clicking the status line retries the upload straight away
+        self.outbox_label.bind("<Button-1>", lambda e: self.outbox_worker.retry_now())
+
+        self.import_label = tk.Label(
+            self.input_frame, text="", font=(self.font_family, 10),
+            bg=self.bg_color, fg=self.accent_color
+        )
+        self.import_label.grid(row=6, column=0, columnspan=2)
+        self.bulk_job = None
+
         self.btn_generate = tk.Button(
             self.button_frame, text="Generate Entry Pass",
             font=(self.font_family, 14, "bold"),
@@ -261,6 +932,16 @@ class InterviewCandidatePOS:
         self.btn_generate.pack(fill='x', pady=8)
         self.add_hover_effect(self.btn_generate, self.button_bg, self.button_hover_bg, self.accent_color, "#121217")
 
+        self.btn_import = tk.Button(
+            self.button_frame, text="Bulk Import (CSV / Excel)",
+            font=(self.font_family, 12, "bold"),
+            bg=self.button_bg, fg=self.accent_color,
+            activebackground=self.button_hover_bg, activeforeground="#121217",
+            relief="flat", command=self.bulk_import, cursor="hand2"
+        )
+        self.btn_import.pack(fill='x', pady=(0, 8))
+        self.add_hover_effect(self.btn_import, self.button_bg, self.button_hover_bg, self.accent_color, "#121217")
+
         self.btn_reset = tk.Button(
             self.button_frame, text="Reset Counter",
             font=(self.font_family, 12, "bold"),
@@ -271,6 +952,10 @@ class InterviewCandidatePOS:
         self.btn_reset.pack(fill='x')
         self.add_hover_effect(self.btn_reset, "#8B0000", "#B22222", "white", "#f0f0f0")
 
+        self.update_outbox_status()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.start_reconcile()
+
     def add_hover_effect(self, widget, bg_normal, bg_hover, fg_normal, fg_hover):
         def on_enter(e):
             widget['background'] = bg_hover
@@ -289,6 +974,53 @@ class InterviewCandidatePOS:
         widget.bind("<Enter>", on_enter)
         widget.bind("<Leave>", on_leave)
 
+    def update_outbox_status(self):
+        try:
+            pending, failed, last_error, clearing, parked = self.outbox.status()
+        except Exception as e:
+            pending, failed, last_error, clearing, parked = 0, 0, None, 0, 0
+            print("Could not read outbox status:", e)
+        # this desk's share of the Sheets per-minute quota, so a busy minute is visible before it fails
+        calls = api_calls.per_minute()
+        usage = f"Sheets API last minute: {calls['reads']} reads, {calls['writes']} writes" + (
+            f", {calls['retries']} retries" if calls["retries"] else "")
+        if clearing:
+            self.outbox_label.config(
+                text=("⏳ Clearing reset entries from Google Sheets…" if last_error is None else
+                      f"⚠ Could not clear reset entries from Google Sheets, retrying (click to retry now)\n{str(last_error)[:120]}")
+                     + f"\n{usage}",
+                fg="#FFD166" if last_error is None else "#FF6B6B"
+            )
+        elif parked and not failed:
+            self.outbox_label.config(
+                text=f"⚠ {parked} entr{'y was' if parked == 1 else 'ies were'} rejected by Google Sheets and set aside"
+                     f"{f', {pending} uploading' if pending else ''} (click to try again)\n{str(last_error)[:120]}\n{usage}",
+                fg="#FF6B6B"
+            )
+        elif not pending:
+            self.outbox_label.config(text=f"✔ All entries saved to Google Sheets\n{usage}", fg="#3CB371")
+        elif failed:
+            self.outbox_label.config(
+                text=f"⚠ {pending} entr{'y' if pending == 1 else 'ies'} waiting — Google Sheets not reachable, retrying "
+                     f"(click to retry now)\n{str(last_error)[:120]}\n{usage}",
+                fg="#FF6B6B"
+            )
+        else:
+            self.outbox_label.config(text=f"⏳ Uploading {pending} entr{'y' if pending == 1 else 'ies'} to Google Sheets…\n{usage}",
+                                     fg="#FFD166")
+        self.root.after(OUTBOX_STATUS_MS, self.update_outbox_status)
+
+    def on_close(self):
+        status = self.outbox.status()
+        pending = status[0] + status[4]
+        if pending and not messagebox.askyesno(
+                "Entries Not Uploaded",
+                f"{pending} entr{'y has' if pending == 1 else 'ies have'} not reached Google Sheets yet.\n"
+                "They are saved and will be uploaded the next time the POS starts.\n\nClose anyway?"):
+            return
+        self.release_lease()
+        self.root.destroy()
+
     def set_window_size(self, width, height):
         screen_width = self.root.winfo_screenwidth()
         screen_height = self.root.winfo_screenheight()
@@ -313,24 +1045,113 @@ class InterviewCandidatePOS:
                     self.ticket_number = 0
                     with open(DATE_TRACK_FILE, 'w', encoding='utf-8') as f:
                         f.write(self.today)
-                    try:
-                        # ensure sheet exists then clear it
-                        self.sheets.create_daily_sheet_if_missing(self.sheet_name)
-                        self.sheets.clear_daily_rows(self.sheet_name)
-                    except Exception as e:
-                        messagebox.showwarning("Sheets Warning", f"Could not clear daily sheet: {e}")
+                    # ...unless another desk has already started today
+                    if not self.allocator.day_started(self.today):
+                        try:
+                            # ensure sheet exists then clear it
+                            self.sheets.create_daily_sheet_if_missing(self.sheet_name)
+                            self.sheets.clear_daily_rows(self.sheet_name)
+                        except Exception as e:
+                            messagebox.showwarning("Sheets Warning", f"Could not clear daily sheet: {e}")
                 else:
-                    # same day: read count from sheet
+                    # same day: the local counter and lease are trusted; the sheet is checked in the background
+                    local = read_ticket_counter(self.today)
+                    if local is not None:
+                        self.ticket_number, self.lease = local
+                        return
+                    # no counter for today yet (first start after an update): read the sheet once
+                    self.ticket_number = 0
                     try:
                         self.sheets.create_daily_sheet_if_missing(self.sheet_name)
-                        self.ticket_number = self.sheets.get_last_ticket_number(self.sheet_name, self.today)
+                        self.allocator.raise_floor(self.today, self.sheets.get_last_ticket_number(self.sheet_name))
                     except Exception as e:
                         messagebox.showwarning("Sheets Warning", f"Could not read ticket number from sheet: {e}")
-                        self.ticket_number = 0
         except Exception as e:
             messagebox.showerror("Initialization Error", f"Error during daily check: {e}\n{traceback.format_exc()}")
             self.ticket_number = 0
 
+    def save_counter(self):
+        try:
+            save_ticket_counter(self.today, self.ticket_number, self.lease)
+        except OSError as e:
+            print("Could not save ticket counter:", e)
+
+    def take_entry_number(self):
+        """
+        The next entry number from this desk's lease. A new block is leased from the shared allocator
+        when the lease is used up, or when the day's numbering was reset (possibly by another desk, which
+        watch_resets() notices); numbers within a lease never touch the shared file.
+        """
+        lease = self.lease
+        if lease is None or lease["next"] > lease["last"] or lease["generation"] != self.allocator_generation:
+            if lease is not None:
+                self.allocator.release(lease["id"], lease["next"])
+            # read before leasing: a reset in between then shows up as a newer generation, never an older one
+            generation = self.allocator.generation(self.today)
+            lease_id, first, last = self.allocator.lease(self.today, DESK_NAME)
+            lease = {"id": lease_id, "next": first, "last": last, "generation": generation}
+            self.allocator_generation = generation
+        entry_no = lease["next"]
+        lease = dict(lease, next=entry_no + 1)
+        save_ticket_counter(self.today, entry_no, lease)
+        self.lease = lease
+        return entry_no
+
+    def watch_resets(self):
+        """
+        Runs in a background thread: every ALLOCATOR_CHECK_SECONDS reads the day's reset generation
+        (its own connection), so a reset on another desk voids this desk's lease without
+        take_entry_number reading the shared file for every entry.
+        """
+        allocator = TokenAllocator(self.allocator.db_file)
+        while True:
+            time.sleep(ALLOCATOR_CHECK_SECONDS)
+            try:
+                self.allocator_generation = allocator.generation(self.today)
+            except Exception as e:
+                print("Could not check the entry-number allocator:", e)
+
+    def release_lease(self):
+        """Hands the unused rest of this desk's lease back (recorded for the day-end report)."""
+        if self.lease is None:
+            return
+        try:
+            self.allocator.release(self.lease["id"], self.lease["next"])
+        except Exception as e:
+            print("Could not release entry-number lease:", e)
+            return
+        self.lease = None
+        self.save_counter()
+
+    def start_reconcile(self):
+        """Checks the highest entry number in the sheet (column F only) without blocking the window."""
+        self.sheet_max = None
+        self.reconcile_pending = True
+
+        def worker():
+            try:
+                self.sheet_max = self.sheets.get_last_ticket_number(self.sheet_name)
+            except Exception as e:
+                print("Could not reconcile ticket counter with the sheet:", e)
+                self.sheet_max = 0
+
+        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(500, self.apply_reconcile)
+
+    def apply_reconcile(self):
+        if not self.reconcile_pending:
+            # the counter was reset meanwhile; the sheet's old numbers no longer count
+            return
+        if self.sheet_max is None:
+            self.root.after(500, self.apply_reconcile)
+            return
+        self.reconcile_pending = False
+        # numbers entered by hand in the sheet must not be leased out again
+        try:
+            self.allocator.raise_floor(self.today, self.sheet_max)
+        except Exception as e:
+            print("Could not update the entry-number allocator:", e)
+
     def generate_ticket(self):
         name = self.name_entry.get().strip()
         contact_number = self.contact_number_entry.get().strip()
@@ -347,19 +1168,29 @@ class InterviewCandidatePOS:
         time_str = now.strftime("%H:%M:%S")
         file_time = now.strftime("%H-%M-%S")
 
-        # increment and update label
-        self.ticket_number += 1
+        # take the next number from this desk's lease, persist it and update label
+        previous_ticket = self.ticket_number
+        try:
+            self.ticket_number = self.take_entry_number()
+        except Exception as e:
+            messagebox.showerror("Counter Error", f"Could not get an entry number:\n{e}")
+            return
         self.ticket_label.config(text=f"Entry No: {self.ticket_number}")
 
-        # append to Google Sheets (A-F)
+        # queue the row for Google Sheets (A-F); the outbox worker uploads it in the background
         try:
-            self.sheets.append_row(self.sheet_name, [date, day, time_str, name, contact_number, str(self.ticket_number)])
+            self.outbox.add(self.sheet_name, self.ticket_number,
+                            [date, day, time_str, name, contact_number, str(self.ticket_number)],
+                            self.lease["generation"])
         except Exception as e:
-            messagebox.showerror("Sheets Error", f"Could not write to Google Sheets:\n{e}")
-            # rollback ticket number visually (optional)
-            self.ticket_number -= 1
+            messagebox.showerror("Outbox Error", f"Could not save the entry:\n{e}")
+            # rollback ticket number visually (optional); the number goes back into the lease
+            self.lease["next"] = self.ticket_number
+            self.ticket_number = previous_ticket
+            self.save_counter()
             self.ticket_label.config(text=f"Entry No: {self.ticket_number}")
             return
+        self.outbox_worker.wake()
 
         # create folder for today and save local PDF token
         folder_name = os.path.join(TICKET_FOLDER, f"{date} - Entries")
@@ -387,42 +1218,63 @@ class InterviewCandidatePOS:
             except Exception as e:
                 messagebox.showerror("Printing Error", f"Could not print ticket: {e}")
 
-    def create_ticket_pdf(self, filepath, name, contact_number, entry_no, date, day, time_str):
-        width = 8 * cm
-        height = 8 * cm
-        c = canvas.Canvas(filepath, pagesize=(width, height))
-        qr_text = f"Entry No: {entry_no}\nName: {name}\nContact: {contact_number}\nDate: {date} ({day})\nTime: {time_str}"
-        qr_img = qrcode.make(qr_text)
-        qr_temp = "temp_qr.png"
-        qr_img.save(qr_temp)
-
-        c.setFont(self.pdf_font, 16)
-        c.setFillColorRGB(0, 0, 0)
-        c.drawCentredString(width / 2, height - 30, "KTech")
-
-        c.setFont(self.pdf_font, 10)
-        c.drawCentredString(width / 2, height - 50, f"{date} ({day}) | {time_str}")
+    def get_pdf_font(self):
+        # registering the font loads reportlab, so it waits until a pass is actually needed
+        if self.pdf_font is None:
+            self.pdf_font = register_pdf_font()
+        return self.pdf_font
 
-        c.setFont(self.pdf_font, 10)
-        c.drawString(20, height - 80, f"Name: {name}")
-        c.drawString(20, height - 110, f"Number: {contact_number}")
-        c.drawString(20, height - 140, f"Entry No: {entry_no}")
-
-        c.drawImage(qr_temp, width - 90, 20, width=70, height=70)
+    def create_ticket_pdf(self, filepath, name, contact_number, entry_no, date, day, time_str):
+        # the font is registered once; the QR image never touches the disk
+        c = new_ticket_canvas(filepath)
+        draw_ticket_page(c, self.get_pdf_font(), name, contact_number, entry_no, date, day, time_str)
+        c.save()
 
-        c.setFont(self.pdf_font, 8)
-        c.drawCentredString(width / 2, 10, "Scan for interview info")
+    def bulk_import(self):
+        if self.bulk_job is not None and self.bulk_job.is_alive():
+            messagebox.showinfo("Bulk Import", "An import is already running.")
+            return
+        path = filedialog.askopenfilename(
+            title="Select candidate list",
+            filetypes=[("Candidate lists", "*.csv *.xlsx"), ("CSV files", "*.csv"), ("Excel files", "*.xlsx")]
+        )
+        if not path:
+            return
+        merged = messagebox.askyesno("Bulk Import", "Also create one PDF with every pass for bulk printing?")
+        self.bulk_job = BulkImport(path, self.sheet_name, self.outbox, self.outbox_worker, self.get_pdf_font(), merged)
+        self.bulk_job.start()
+        self.btn_import.config(state="disabled")
+        self.poll_bulk_import()
 
-        c.showPage()
-        c.save()
-        os.remove(qr_temp)
+    def poll_bulk_import(self):
+        job = self.bulk_job
+        if job.result is None:
+            self.import_label.config(text=job.status)
+            self.root.after(300, self.poll_bulk_import)
+            return
+        self.import_label.config(text="")
+        self.btn_import.config(state="normal")
+        if job.failed:
+            messagebox.showerror(*job.result)
+        else:
+            messagebox.showinfo(*job.result)
 
     def reset_counter(self):
-        if not messagebox.askyesno("Confirm Reset", "Are you sure you want to reset the entry number?"):
+        if not messagebox.askyesno("Confirm Reset",
+                                   "Are you sure you want to reset the entry number?\n"
+                                   "Numbering restarts from 1 on every desk."):
             return
 
-        # reset counter variable and label
+        # reset counter variable and label; every desk's lease for today is dropped
         self.ticket_number = 0
+        self.reconcile_pending = False
+        self.lease = None
+        try:
+            self.allocator.reset_day(self.today)
+            self.allocator_generation = self.allocator.generation(self.today)
+        except Exception as e:
+            messagebox.showwarning("Allocator Warning", f"Could not reset the shared entry numbers: {e}")
+        self.save_counter()
         self.ticket_label.config(text="Entry No: 0")
 
         # reset date tracker file
@@ -432,15 +1284,20 @@ class InterviewCandidatePOS:
         except Exception as e:
             messagebox.showwarning("File Warning", f"Could not update date tracking file: {e}")
 
-        # clear today's sheet rows
+        # drop entries that were never uploaded; the outbox worker clears today's sheet rows
+        # before it sends anything newer (progress shows in the upload status line)
         try:
-            self.sheets.clear_daily_rows(self.sheet_name)
+            self.outbox_worker.reset_sheet(self.sheet_name)
+            forget_import_jobs(self.sheet_name, self.outbox)
             messagebox.showinfo("Reset", "Daily entries cleared.")
         except Exception as e:
-            messagebox.showerror("Sheets Error", f"Could not clear daily sheet:\n{e}")
+            messagebox.showerror("Outbox Error", f"Could not drop the queued entries:\n{e}")
 
 if __name__ == "__main__":
+    # bulk import renders passes in worker processes; needed when packaged as an .exe
+    multiprocessing.freeze_support()
     try:
+        move_legacy_desk_files()
         root = tk.Tk()
         root.configure(bg="#121217")
         app = InterviewCandidatePOS(root)
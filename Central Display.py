@@ -3,24 +3,34 @@
 # You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/.
 import tkinter as tk
 from tkinter import ttk
-import json
 import os
 import platform
+import queue
+import threading
+import time
 from datetime import datetime
 
-# Google Sheets
-import gspread
-from google.oauth2.service_account import Credentials
+from queue_store import open_queue_store, ROOM_CLOSED, ROOM_WAITING
+from sheets_client import get_client, quote_tab, AdaptiveInterval, TabVersion
 
 # Windows sound
 if platform.system() == "Windows":
     import winsound
 
-STATE_FILE = "queue_state.json"
 SHEET_ID_FILE = "sheetsid.txt"
 SERVICE_JSON = "service_account.json"
 
-REFRESH_INTERVAL = 3000  # ms
+CHANGE_POLL_INTERVAL = 150  # ms between cheap checks of the queue state
+BLINK_STEPS = 6  # on/off half-cycles per highlighted row
+BLINK_INTERVAL = 500  # ms
+NAME_INDEX_BASE = 15  # seconds between downloads of today's tab for the token→name index while names are coming in
+# shown after the room name (rooms publish their status with the SQLite queue backend only)
+ROOM_STATUS_TEXT = {ROOM_WAITING: "Waiting", ROOM_CLOSED: "Closed"}
+
+# Daily tab and column headers written by Candidates POS.py
+SHEET_TAB_FORMAT = "%Y-%m-%d"
+TOKEN_HEADER = "Entry No"
+NAME_HEADER = "Candidate Name"
 
 # Theme colors
 BG_COLOR = "#1e1e1e"
@@ -82,9 +92,23 @@ class CentralDisplayApp:
         self.tree.tag_configure('blink', background=SELECT_BG_COLOR, foreground=SELECT_FG_COLOR)
 
         self.previous_data = {}
-
-        # Load Google Sheets once
-        self.sheet = self.connect_to_sheets()
+        self.needs_render = True
+        self.row_ids = {}       # counter -> Treeview item id
+        self.row_values = {}    # counter -> (token, name, room) currently shown
+        self.blinking = {}      # Treeview item id -> blink steps left
+        self.blink_job = None
+        self.queue_store = open_queue_store()   # shared called-token state, read incrementally
+
+        # Google Sheets client (shared, pooled); today's tab is read by refresh_name_index
+        self.sheets = self.connect_to_sheets()
+        self.sheet_tab = None   # tab the name index was built from
+        self.name_index = {}            # Entry No -> Candidate Name
+        self.name_poll = AdaptiveInterval(base=NAME_INDEX_BASE)  # slows down while no one registers
+        self.name_next_at = 0.0         # time.monotonic() of the next download
+        self.name_misses = set()        # tokens already looked up without a name (one early refresh each)
+        self.name_downloads = queue.Queue()  # (tab, rows, or None if unchanged / failed) from the download thread
+        self.name_downloading = False
+        self.name_version = None        # sentinel check of today's tab (download thread only)
 
         self.update_time()
         self.refresh_data()
@@ -95,37 +119,86 @@ class CentralDisplayApp:
                 print("Sheets disabled (missing file).")
                 return None
 
-            with open(SHEET_ID_FILE, "r") as f:
-                sheet_id = f.read().strip()
-
-            scope = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
-            creds = Credentials.from_service_account_file(SERVICE_JSON, scopes=scope)
-            client = gspread.authorize(creds)
-
-            today = datetime.now().strftime("%d-%m-%Y")
-            sheet = client.open_by_key(sheet_id).worksheet(today)
+            client = get_client(readonly=True)
 
             print("Google Sheets connected.")
-            return sheet
+            return client
 
         except Exception as e:
             print("Sheets connection failed:", e)
             return None
 
-    def get_name_from_sheet(self, token):
-        """Reads candidate name from Google Sheet"""
-        if self.sheet is None:
-            return None
+    def refresh_name_index(self):
+        """
+        Downloads today's tab when self.name_poll says so and rebuilds the Entry No -> name index: soon
+        after the index changed, every NAME_INDEX_BASE while names keep coming, up to 30 s apart when idle.
+        The download runs on a worker thread (a rate-limited or retried read can take a while), so the
+        board keeps updating meanwhile; a failed download keeps the previous index.
+        Returns True if the index changed.
+        """
+        if self.sheets is None:
+            return False
+        if not self.name_downloading and time.monotonic() >= self.name_next_at:
+            self.name_downloading = True
+            today = datetime.now().strftime(SHEET_TAB_FORMAT)
+            threading.Thread(target=self.download_names, args=(today,), daemon=True).start()
 
         try:
-            records = self.sheet.get_all_records()
-            for row in records:
-                if str(row.get("Token")).strip() == str(token).strip():
-                    return row.get("Name", "Unknown")
-        except:
-            return None
+            today, rows = self.name_downloads.get_nowait()
+        except queue.Empty:
+            return False
+        self.name_downloading = False
+        changed = rows is not None and self.build_name_index(today, rows)
+        self.name_next_at = time.monotonic() + self.name_poll.update(changed)
+        return changed
+
+    def build_name_index(self, today, rows):
+        """Replaces the name index with today's downloaded rows; returns True if it changed."""
+        if self.sheet_tab != today:
+            self.sheet_tab = today
+            self.name_misses = set()
+
+        if not rows:
+            changed = bool(self.name_index)
+            self.name_index = {}
+            return changed
+
+        header = [h.strip() for h in rows[0]]
+        if TOKEN_HEADER not in header or NAME_HEADER not in header:
+            print(f"Sheet is missing '{TOKEN_HEADER}' / '{NAME_HEADER}' columns.")
+            return False
+        token_col = header.index(TOKEN_HEADER)
+        name_col = header.index(NAME_HEADER)
+
+        index = {}
+        for row in rows[1:]:
+            if len(row) > token_col and row[token_col].strip():
+                index[row[token_col].strip()] = row[name_col] if len(row) > name_col else ""
+        changed = index != self.name_index
+        self.name_index = index
+        return changed
+
+    def download_names(self, tab):
+        # the sentinel cells first; the rows only when they moved (both in one request the first time)
+        if self.name_version is None or self.name_version.tab != tab:
+            self.name_version = TabVersion(self.sheets, tab)
+        try:
+            rows = self.name_version.fetch(f"{quote_tab(tab)}!A:F")
+        except Exception as e:
+            print("Sheets read failed:", e)
+            rows = None
+        self.name_downloads.put((tab, rows))
 
-        return None
+    def get_name_from_sheet(self, token):
+        """Looks up the candidate name in the token→name index"""
+        token = str(token).strip()
+        name = self.name_index.get(token)
+        if name is None and token not in self.name_misses:
+            # probably registered after the last download: refresh now, but only once for this token
+            self.name_misses.add(token)
+            self.name_poll.hurry()
+            self.name_next_at = 0.0
+        return name or None
 
     def exit_fullscreen(self, event=None):
         self.root.attributes('-fullscreen', False)
@@ -139,64 +212,102 @@ class CentralDisplayApp:
         self.root.after(1000, self.update_time)
 
     def refresh_data(self):
-        self.tree.delete(*self.tree.get_children())
-        latest_data = {}
-
-        if os.path.exists(STATE_FILE):
-            with open(STATE_FILE, "r") as f:
-                state = json.load(f)
-
-            latest_per_counter = {}
-            for item in state.get("called_tokens", []):
-                latest_per_counter[item["counter"]] = item
-
-            sorted_items = sorted(
-                latest_per_counter.items(),
-                key=lambda x: x[1].get("timestamp", ""),
-                reverse=True
-            )
-
-            for i, (counter, entry) in enumerate(sorted_items):
-                token = entry["token"]
-
-                # Try Google Sheets → fallback to JSON name
-                name = self.get_name_from_sheet(token) or entry["name"]
+        """Cheap change check every CHANGE_POLL_INTERVAL; the table is only rebuilt when something changed"""
+        changed = self.needs_render
+        try:
+            # a stat() / PRAGMA data_version when nothing was called
+            if self.queue_store.refresh():
+                changed = True
+        except Exception as e:
+            print("Error reading queue state:", e)
 
-                latest_data[counter] = token
-                tag = 'evenrow' if i % 2 == 0 else 'oddrow'
+        # downloads today's tab only when its own TTL has expired
+        if self.refresh_name_index():
+            changed = True
 
-                row_id = self.tree.insert("", "end",
-                                          values=(token, name, counter),
-                                          tags=(tag,))
+        if changed:
+            self.needs_render = False
+            self.render_table()
+        self.root.after(CHANGE_POLL_INTERVAL, self.refresh_data)
 
-                if counter not in self.previous_data or self.previous_data[counter] != token:
-                    self.blink_row(row_id, 0)
-                    self.play_sound()
+    def render_table(self):
+        """Updates only the rows whose token, name or position changed"""
+        latest_data = {}
+        new_call = False
+
+        sorted_items = sorted(
+            self.queue_store.latest_per_counter.items(),
+            key=lambda x: x[1].get("timestamp", ""),
+            reverse=True
+        )
+
+        for i, (counter, entry) in enumerate(sorted_items):
+            token = entry["token"]
+
+            # Try Google Sheets → fallback to JSON name
+            name = self.get_name_from_sheet(token) or entry["name"]
+            status = ROOM_STATUS_TEXT.get(self.queue_store.room_states.get(counter))
+            values = (token, name, f"{counter} ({status})" if status else counter)
+            latest_data[counter] = token
+
+            row_id = self.row_ids.get(counter)
+            if row_id is None:
+                row_id = self.tree.insert("", i, values=values, tags=(self.stripe_tag(i),))
+                self.row_ids[counter] = row_id
+            else:
+                if self.tree.index(row_id) != i:
+                    self.tree.move(row_id, "", i)
+                if self.row_values.get(counter) != values:
+                    self.tree.item(row_id, values=values)
+            self.row_values[counter] = values
+
+            if counter not in self.previous_data or self.previous_data[counter] != token:
+                self.start_blink(row_id)
+                new_call = True
+
+        # counters that disappeared (queue reset)
+        for counter in list(self.row_ids):
+            if counter not in latest_data:
+                self.tree.delete(self.row_ids.pop(counter))
+                self.row_values.pop(counter, None)
+
+        # keep the striping right for rows that moved and are not blinking
+        for i, row_id in enumerate(self.tree.get_children()):
+            if row_id not in self.blinking and self.tree.item(row_id, "tags") != (self.stripe_tag(i),):
+                self.tree.item(row_id, tags=(self.stripe_tag(i),))
+
+        # one notification per batch of calls
+        if new_call:
+            self.play_sound()
 
         self.previous_data = latest_data
-        self.root.after(REFRESH_INTERVAL, self.refresh_data)
-
-    def blink_row(self, row_id, count):
-        if count < 6:
-            tags = self.tree.item(row_id, "tags")
-
-            normal_bg = ROW_COLOR_1 if 'oddrow' in tags else ROW_COLOR_2
-
-            color = SELECT_BG_COLOR if count % 2 == 0 else normal_bg
-            self.tree.tag_configure("blink", background=color)
-
-            new_tags = [t for t in tags if t not in ('oddrow', 'evenrow')]
-            new_tags.append("blink")
-            self.tree.item(row_id, tags=new_tags)
-
-            self.root.after(500, lambda: self.blink_row(row_id, count + 1))
-        else:
-            tags = self.tree.item(row_id, "tags")
-            new_tags = [t for t in tags if t != "blink"]
 
-            index = self.tree.index(row_id)
-            new_tags.append('evenrow' if index % 2 == 0 else 'oddrow')
-            self.tree.item(row_id, tags=new_tags)
+    def stripe_tag(self, index):
+        return 'evenrow' if index % 2 == 0 else 'oddrow'
+
+    def start_blink(self, row_id):
+        # (re)start this row's blink right away; a single timer animates every blinking row
+        self.tree.item(row_id, tags=("blink",))
+        self.blinking[row_id] = BLINK_STEPS - 1
+        if self.blink_job is None:
+            self.blink_job = self.root.after(BLINK_INTERVAL, self.blink_tick)
+
+    def blink_tick(self):
+        self.blink_job = None
+        for row_id, steps in list(self.blinking.items()):
+            if not self.tree.exists(row_id):
+                del self.blinking[row_id]
+            elif steps > 0:
+                # each row keeps its own phase, so rows that changed at different times blink independently
+                on = (BLINK_STEPS - steps) % 2 == 0
+                tag = "blink" if on else self.stripe_tag(self.tree.index(row_id))
+                self.tree.item(row_id, tags=(tag,))
+                self.blinking[row_id] = steps - 1
+            else:
+                self.tree.item(row_id, tags=(self.stripe_tag(self.tree.index(row_id)),))
+                del self.blinking[row_id]
+        if self.blinking:
+            self.blink_job = self.root.after(BLINK_INTERVAL, self.blink_tick)
 
     def play_sound(self):
         if platform.system() == "Windows" and os.path.exists("dip_config/notify.wav"):
@@ -1,16 +1,31 @@
 @echo off
 set FILE=queue_state.json
+set JOURNAL=queue_state.jsonl
 
-:: Delete the file if it exists
+:: Prefer the maintenance command shipped with the apps
+where python >nul 2>nul
+if %ERRORLEVEL%==0 (
+    python queue_store.py reset
+    pause
+    exit /b
+)
+
+:: Fallback without Python: delete the files and start a new generation by hand
 if exist "%FILE%" del "%FILE%"
+if exist "%JOURNAL%" del "%JOURNAL%"
+
+set GEN=%RANDOM%%RANDOM%
 
-:: Create a new file with default JSON
+:: Create a new snapshot with default JSON
 (
 echo {
-echo     "queue": [],
+echo     "generation": %GEN%,
 echo     "called_tokens": []
 echo }
 ) > "%FILE%"
 
-echo %FILE% has been reset successfully.
+:: Start an empty journal for the same generation
+echo {"generation": %GEN%}> "%JOURNAL%"
+
+echo %FILE% and %JOURNAL% have been reset successfully.
 pause
@@ -4,18 +4,13 @@
 import tkinter as tk
 from tkinter import messagebox
 import tkinter.font as tkfont
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-import json
-import os
-from datetime import datetime
+import queue
 import traceback
 
+from queue_store import open_queue_store, ROOM_OPEN, ROOM_CLOSED, ROOM_WAITING
+from token_poller import SheetsReader, TokenPoller
+
 # --- Constants / Config ---
-SHEETS_ID_FILE = "sheetsid.txt"
-SERVICE_ACCOUNT_FILE = "service_account.json"
-STATE_FILE = "queue_state.json"
 COUNTER_NAME = "Room 2"  # Change per instance if needed
 
 # UI Colors (dark theme)
@@ -28,11 +23,6 @@ DISABLED_FG = "#555555"
 RED_COLOR = "#FF5555"
 GREEN_COLOR = "#55FF55"
 
-# Ensure state file exists
-if not os.path.exists(STATE_FILE):
-    with open(STATE_FILE, "w", encoding="utf-8") as f:
-        json.dump({"called_tokens": []}, f)
-
 # --- Utility: pick preferred font ---
 def pick_preferred_font():
     preferred_fonts = ["Montserrat", "Aptos", "Segoe UI", "Helvetica", "Arial"]
@@ -45,54 +35,12 @@ def pick_preferred_font():
         pass
     return "TkDefaultFont"
 
-# --- Sheets reader (read-only) ---
-class SheetsReader:
-    SCOPES = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
-
-    def __init__(self):
-        self.sheet_id = self._read_sheet_id()
-        self._validate_service_account()
-        creds = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=self.SCOPES)
-        self.service = build("sheets", "v4", credentials=creds)
-
-    def _read_sheet_id(self):
-        if not os.path.exists(SHEETS_ID_FILE):
-            raise FileNotFoundError(f"{SHEETS_ID_FILE} not found. Create it and put the spreadsheet ID inside.")
-        with open(SHEETS_ID_FILE, "r", encoding="utf-8") as f:
-            sid = f.read().strip()
-        if not sid:
-            raise ValueError(f"{SHEETS_ID_FILE} is empty. Paste the spreadsheet ID inside.")
-        return sid
-
-    def _validate_service_account(self):
-        if not os.path.exists(SERVICE_ACCOUNT_FILE):
-            raise FileNotFoundError(f"{SERVICE_ACCOUNT_FILE} not found. Place your service account JSON file in the project folder.")
-
-    def fetch_today_rows(self, sheet_name=None):
-        """
-        Fetch values from the spreadsheet.
-        Returns a list of rows (each row is a list of cell values).
-        By default reads from the first sheet range A:F for convenience.
-        If sheet_name provided, queries that tab: '{sheet_name}'!A:F
-        """
-        if sheet_name:
-            range_name = f"'{sheet_name}'!A:F"
-        else:
-            range_name = "Sheet1!A:F"
-        try:
-            result = self.service.spreadsheets().values().get(spreadsheetId=self.sheet_id, range=range_name).execute()
-            values = result.get("values", [])
-            return values
-        except HttpError as e:
-            # Bubble up a clearer message
-            raise RuntimeError(f"Google Sheets API error: {e}")
-
 # --- Main App ---
 class TokenCallerApp:
     def __init__(self, master):
         self.master = master
         self.master.title(f"{COUNTER_NAME} Control Panel")
-        self.master.geometry("420x320")
+        self.master.geometry("420x350")
         self.master.configure(bg=BG_COLOR)
 
         self.font_family = pick_preferred_font()
@@ -102,9 +50,10 @@ class TokenCallerApp:
         heading.pack(pady=6)
 
         # Data
-        self.token_data = []       # list of dicts: {"token","name","date","time"}
+        self.token_data = []       # latest snapshot published by the poller
         self.current_token = None
         self.counter_closed = False
+        self.queue_store = open_queue_store()   # shared called-token state (JSON journal or SQLite)
 
         # Sheets reader (init; show error if missing)
         try:
@@ -166,127 +115,59 @@ class TokenCallerApp:
                                     fg=FG_COLOR, bg=BG_COLOR, justify="left")
         self.token_label.pack(pady=6)
 
-        # initial load
-        self.refresh_interval_ms = 3000
-        self.load_tokens_from_sheets()
+        # Sheets problems; the last token list stays in use meanwhile
+        self.sheets_status = tk.Label(master, text="", font=(self.font_family, 9),
+                                      fg=RED_COLOR, bg=BG_COLOR, wraplength=400, justify="left")
+        self.sheets_status.pack(pady=(0, 4))
+
+        # initial load happens on the poller thread; the UI only picks up finished snapshots
+        self.snapshot_check_ms = 100
+        self.poller = TokenPoller(self.sheets) if self.sheets else None
+        if self.poller:
+            self.poller.start()
         self.refresh_loop()
 
     def on_display_close(self):
         messagebox.showinfo("Info", "Display window cannot be closed separately.")
 
-    def load_tokens_from_sheets(self):
-        """
-        Loads token rows for today from the Google Sheet into self.token_data.
-        Expected sheet columns (A-F): Date | Day | Time | Candidate Name | Contact Number | Entry No
-        """
-        self.token_data = []
-        if not self.sheets:
-            # Sheets reader not initialized
-            return
-
-        # Use today's sheet tab name (YYYY-MM-DD). If that tab doesn't exist, try the default first sheet range.
-        today_tab = datetime.now().strftime("%Y-%m-%d")
-        rows = []
-        # Try reading the daily tab first (common setup where each day is a tab)
-        try:
-            rows = self.sheets.fetch_today_rows(sheet_name=today_tab)
-        except Exception as e_tab:
-            # If daily tab doesn't exist or error, fallback to default A:F of first sheet
-            try:
-                rows = self.sheets.fetch_today_rows(sheet_name=None)
-            except Exception as e_default:
-                # Could not read any sheet; show warning once in console
-                print("Sheets read error:", e_tab, e_default)
-                return
-
-        if not rows or len(rows) <= 1:
-            # no data or only header
-            return
-
-        today = datetime.now().strftime("%Y-%m-%d")
-        # rows[0] is header; iterate from rows[1:]
-        for r in rows[1:]:
-            # ensure row has at least 6 columns safely
-            # A: Date (index 0), D: Name (3), F: Entry No (5), C: Time (2)
-            if len(r) >= 6:
-                date_val = r[0]
-                try:
-                    if date_val == today:
-                        token = r[5]
-                        name = r[3]
-                        time_val = r[2] if len(r) > 2 else ""
-                        self.token_data.append({
-                            "token": token,
-                            "name": name,
-                            "date": date_val,
-                            "time": time_val
-                        })
-                except Exception:
-                    # ignore row if malformed
-                    continue
-            else:
-                # row too short — try best-effort mapping if indices exist
-                if len(r) >= 1 and r[0] == today:
-                    token = r[5] if len(r) > 5 else (r[-1] if len(r) > 0 else "")
-                    name = r[3] if len(r) > 3 else ""
-                    time_val = r[2] if len(r) > 2 else ""
-                    self.token_data.append({
-                        "token": token,
-                        "name": name,
-                        "date": r[0],
-                        "time": time_val
-                    })
-
     def refresh_loop(self):
-        # reload tokens (only if room is open)
-        if not self.counter_closed:
-            try:
-                self.load_tokens_from_sheets()
-            except Exception as e:
-                print("Error loading tokens:", e)
-        # schedule next refresh
-        self.master.after(self.refresh_interval_ms, self.refresh_loop)
+        # take the newest snapshot the poller has published; never waits on the Sheets API
+        if self.poller:
+            latest = None
+            while True:
+                try:
+                    latest = self.poller.snapshots.get_nowait()
+                except queue.Empty:
+                    break
+            if latest is not None:
+                self.token_data = latest
+            error = self.poller.error
+            status = f"Google Sheets error, showing the last list: {error}" if error else ""
+            if self.sheets_status.cget("text") != status:
+                self.sheets_status.config(text=status)
+        # schedule next check
+        self.master.after(self.snapshot_check_ms, self.refresh_loop)
 
     def call_next(self):
         if self.counter_closed:
             messagebox.showwarning("Room Closed", "This room is closed.")
             return
 
-        # load local state
+        # claim the next uncalled token under the shared queue lock so two rooms never get the same one
         try:
-            with open(STATE_FILE, "r", encoding="utf-8") as f:
-                state = json.load(f)
-        except Exception:
-            state = {"called_tokens": []}
-
-        called_tokens = [item.get("token") for item in state.get("called_tokens", [])]
-
-        # pick next token not in called_tokens
-        next_token = None
-        for t in self.token_data:
-            if t.get("token") and t.get("token") not in called_tokens:
-                next_token = t
-                break
+            next_token = self.queue_store.claim_next(self.token_data, COUNTER_NAME)
+        except Exception as e:
+            messagebox.showwarning("Write Error", f"Could not update local state file:\n{e}")
+            return
 
         if next_token:
             self.current_token = next_token
-            # append to local state
-            state.setdefault("called_tokens", []).append({
-                "token": next_token.get("token"),
-                "name": next_token.get("name"),
-                "counter": COUNTER_NAME,
-                "time": next_token.get("time"),
-                "called_at": datetime.now().isoformat()
-            })
-            try:
-                with open(STATE_FILE, "w", encoding="utf-8") as f:
-                    json.dump(state, f, indent=2)
-            except Exception as e:
-                messagebox.showwarning("Write Error", f"Could not update local state file:\n{e}")
-
             # update UI/display
             self.update_display(next_token)
         else:
+            if self.poller:
+                # a candidate may have just registered: look for new rows right away
+                self.poller.hurry()
             messagebox.showinfo("Info", "No more tokens to call.")
 
     def recall(self):
@@ -307,6 +188,15 @@ class TokenCallerApp:
         self.current_token = None
         self.token_label.config(text="Waiting", fg=FG_COLOR)
         self.display_label.config(text="Waiting", fg=FG_COLOR, font=(self.font_family, 24, "bold"))
+        self.publish_room_status(ROOM_WAITING)
+
+    def publish_room_status(self, status):
+        # only the SQLite backend keeps room status; the JSON journal ignores it
+        try:
+            token = self.current_token.get("token") if self.current_token else None
+            self.queue_store.set_room_status(COUNTER_NAME, status, token)
+        except Exception as e:
+            print("Error updating room status:", e)
 
     def update_display(self, token_info):
         token_text = f"Token: {token_info.get('token')}\nName: {token_info.get('name')}"
@@ -318,6 +208,8 @@ class TokenCallerApp:
         if not messagebox.askyesno("Close Room", "Are you sure you want to close this interview room?"):
             return
         self.counter_closed = True
+        if self.poller:
+            self.poller.paused.set()
         self.call_button.config(state='disabled', bg=DISABLED_BG, fg=DISABLED_FG)
         self.recall_button.config(state='disabled', bg=DISABLED_BG, fg=DISABLED_FG)
         self.waiting_button.config(state='disabled', bg=DISABLED_BG, fg=DISABLED_FG)
@@ -325,12 +217,16 @@ class TokenCallerApp:
 
         self.display_label.config(text="Room Closed", fg=RED_COLOR, font=(self.font_family, 28, "bold"))
         self.token_label.config(text="Room Closed", fg=RED_COLOR)
+        self.publish_room_status(ROOM_CLOSED)
 
     def open_counter(self):
         if not self.counter_closed:
             messagebox.showinfo("Info", "Room is already open.")
             return
         self.counter_closed = False
+        if self.poller:
+            self.poller.paused.clear()
+            self.poller.poll_now()
         self.call_button.config(state='normal', bg=BUTTON_BG, fg=BUTTON_FG)
         self.recall_button.config(state='normal', bg=BUTTON_BG, fg=BUTTON_FG)
         self.waiting_button.config(state='normal', bg=BUTTON_BG, fg=BUTTON_FG)
@@ -339,6 +235,7 @@ class TokenCallerApp:
         self.current_token = None
         self.token_label.config(text="Waiting", fg=FG_COLOR)
         self.display_label.config(text="Waiting", fg=FG_COLOR, font=(self.font_family, 24, "bold"))
+        self.publish_room_status(ROOM_OPEN)
 
 # --- Run app ---
 if __name__ == "__main__":
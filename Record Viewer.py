@@ -1,90 +1,373 @@
 # This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
 # This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
 # You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/.
-from flask import Flask, render_template_string
-from datetime import datetime
-import gspread
-from google.oauth2.service_account import Credentials
+from flask import Flask, Response, request, make_response, jsonify, abort
+from collections import OrderedDict
+from datetime import datetime, timezone
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
 
-# ------------------------------------------------------
-# READ SHEET ID FROM FILE
-# ------------------------------------------------------
-with open("sheetsid.txt", "r") as f:
-    SHEET_ID = f.read().strip()
+from sheets_client import get_client, quote_tab, pad_rows, AdaptiveInterval, TabVersion
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:
+    brotli = None
 
 # ------------------------------------------------------
-# GOOGLE SHEETS AUTH
+# GOOGLE SHEETS (sheetsid.txt + service_account.json, read-only)
 # ------------------------------------------------------
-SCOPES = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
+# one pooled session shared by every request thread and tab cache
+client = get_client(readonly=True)
+app = Flask(__name__)
 
-creds = Credentials.from_service_account_file(
-    "service_account.json",
-    scopes=SCOPES
-)
+CACHE_TTL = 3  # seconds; every browser shares one download per TTL (shorter right after a change, up to 30 s when idle)
+STREAM_KEEPALIVE = 15  # seconds between SSE comments on an idle stream
+STREAM_MAX_AGE = 300  # seconds; a stream then ends and the browser reconnects (resuming from Last-Event-ID)
+SHEET_TAB_FORMAT = "%Y-%m-%d"  # one tab per day, named by Candidates POS.py
+TAB_CACHE_SIZE = 30  # past days kept in memory
+TAB_CACHE_FOLDER = os.path.join("config", "record_cache")  # past days kept on disk; set to None to disable
 
-client = gspread.authorize(creds)
-app = Flask(__name__)
+# web fonts: a copy in static/fonts/montserrat.css is used when present; set FONTS_CSS_URL to None for system fonts only
+FONTS_CSS_URL = "https://fonts.googleapis.com/css2?family=Montserrat:wght@400;600;700;800&display=swap"
+LOCAL_FONTS_CSS = os.path.join(app.static_folder, "fonts", "montserrat.css")
+
+# production server (see main(); every open browser keeps one thread busy with its live-update stream)
+HOST = "0.0.0.0"
+PORT = 80
+SERVER_THREADS = 64
+STREAM_THREAD_RESERVE = 16  # threads never given to streams, so pages and /api keep answering; extra browsers poll /api
+
+COMPRESS_MIN_SIZE = 500  # bytes; smaller responses are sent as they are
+COMPRESSIBLE_TYPES = ("text/html", "application/json")
+COMPRESSED_CACHE_SIZE = 64  # compressed bodies kept per (ETag, encoding)
 
 # ------------------------------------------------------
-# FETCH DATA FROM GOOGLE SHEETS
+# SHARED SHEET CACHE (one per daily tab)
 # ------------------------------------------------------
-def sheet_to_html():
+class SheetCache:
+    """
+    Keeps the last download of one daily tab.
+    Today's tab is re-read at most once per TTL, which adapts to activity (AdaptiveInterval around
+    CACHE_TTL: sub-second after a change, up to 30 s once nothing changes), and only downloaded when its
+    sentinel cells (TabVersion) moved; a past day never changes, so once it
+    has been downloaded it is kept for good (and written to TAB_CACHE_FOLDER so restarts don't read it again).
+    Only one refresh runs at a time; other requests keep serving the previous data meanwhile
+    (the very first requests wait for the initial load).
+    Each new version carries the delta against the previous one, computed once for all live streams.
+    """
+
+    def __init__(self, tab, ttl, live=True):
+        self.tab = tab
+        self.ttl = ttl
+        self.interval = AdaptiveInterval(base=ttl) if live else None
+        self.version = TabVersion(client, tab)
+        self.live = live
+        self.complete = False  # a past day's tab has been downloaded and never needs reading again
+        self.lock = threading.Lock()
+        self.loaded = threading.Event()
+        self.refreshing = False
+        self.fetched_at = 0.0
+        self.changed = threading.Condition()
+        # replaced as a whole so readers never see a half-updated snapshot
+        self.snapshot = {"version": 0, "data": [], "error": None, "etag": None, "last_modified": None,
+                         "delta": None, "page": None, "index": None}
+        if not live:
+            self._load_from_disk()
+
+    def get(self):
+        with self.lock:
+            stale = not self.complete and time.monotonic() - self.fetched_at >= self.ttl
+            start_refresh = stale and not self.refreshing
+            if start_refresh:
+                self.refreshing = True
+        if start_refresh:
+            changed = False
+            try:
+                changed = self._refresh()
+            finally:
+                with self.lock:
+                    self.refreshing = False
+                    self.fetched_at = time.monotonic()
+                    if self.live:
+                        self.ttl = self.interval.update(changed)
+                self.loaded.set()
+        elif not self.loaded.is_set():
+            self.loaded.wait(timeout=30)
+        return self.snapshot
+
+    def end_of_day(self):
+        """Today's tab became a past day: read it one last time, then keep it."""
+        with self.lock:
+            self.live = False
+            self.fetched_at = 0.0
+
+    def wait_for_change(self, version, timeout):
+        """Blocks until a snapshot newer than version is published or timeout seconds pass."""
+        with self.changed:
+            self.changed.wait_for(lambda: self.snapshot["version"] != version, timeout)
+
+    def _refresh(self):
+        """Downloads the tab and publishes it; returns True if the data changed."""
+        try:
+            # A:F only (the sentinel cells sit in H1:I1)
+            range_name = f"{quote_tab(self.tab)}!A:F"
+            if self.live and self.snapshot["data"]:
+                rows = self.version.fetch(range_name)
+                if rows is None:
+                    return False
+            else:
+                # downloaded whatever the sentinel says: read it along with the rows in one request
+                rows = self.version.read(range_name)
+            # pad ragged rows so every row has a cell per column
+            data = pad_rows(rows)
+            error = None
+        except Exception as e:
+            print(f"Error loading sheet '{self.tab}':", e)
+            if self.snapshot["data"]:
+                # keep serving the last good data
+                return False
+            data, error = [], str(e)
+
+        if not self.live and error is None:
+            self.complete = True
+            self._save_to_disk(data)
+        return self._publish(data, error)
+
+    def _publish(self, data, error):
+        etag = hashlib.sha1(json.dumps([self.tab, data, error]).encode("utf-8")).hexdigest()
+        previous = self.snapshot
+        if etag == previous["etag"]:
+            return False
+        with self.changed:
+            self.snapshot = {
+                "version": previous["version"] + 1,
+                "data": data,
+                "error": error,
+                "etag": etag,
+                "last_modified": datetime.now(timezone.utc).replace(microsecond=0),
+                "delta": row_delta(previous["data"], data) if not error and not previous["error"] else None,
+                "page": None,
+                "index": None,
+            }
+            self.changed.notify_all()
+        return True
+
+    def _disk_path(self):
+        return os.path.join(TAB_CACHE_FOLDER, f"{self.tab}.json") if TAB_CACHE_FOLDER else None
+
+    def _load_from_disk(self):
+        path = self._disk_path()
+        if not path or not os.path.exists(path):
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)["data"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring cached copy of '{self.tab}':", e)
+            return
+        self.complete = True
+        self.loaded.set()
+        self._publish(data, None)
+
+    def _save_to_disk(self, data):
+        path = self._disk_path()
+        if not path or not data:
+            return
+        try:
+            os.makedirs(TAB_CACHE_FOLDER, exist_ok=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"tab": self.tab, "data": data}, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Could not save cached copy of '{self.tab}':", e)
+
+def row_delta(old, new):
+    """
+    Rows appended or changed between two downloads, as {sheet row index: row}.
+    Returns None when a full reload is needed (header changed or rows were removed).
+    """
+    if not old or not new or old[0] != new[0] or len(new) < len(old):
+        return None
+    return {i: row for i, row in enumerate(new) if i >= len(old) or old[i] != row}
+
+# live-update streams allowed at once (main() sizes it to the server's thread count)
+stream_slots = threading.BoundedSemaphore(SERVER_THREADS - STREAM_THREAD_RESERVE)
+
+tab_caches = OrderedDict()  # tab title -> SheetCache, least recently viewed first
+tab_caches_lock = threading.Lock()
+
+def resolve_day(day):
+    """Maps the route's day ("today" or YYYY-MM-DD) to a tab title, or None when it isn't a date or is still to come."""
+    if day == "today":
+        return datetime.now().strftime(SHEET_TAB_FORMAT)
     try:
-        sh = client.open_by_key(SHEET_ID)
-        ws = sh.sheet1  # first worksheet (you can change this)
-        data = ws.get_all_values()
-
-        if not data:
-            return "<p style='color:#ffdede'>No data found.</p>"
-
-        # Build table HTML
-        header = data[0]
-        rows = data[1:]
-
-        html = '<table class="candidate-table" role="table">'
-        html += "<thead><tr>"
-        for col in header:
-            html += f"<th scope='col'>{col}</th>"
-        html += "</tr></thead>"
-
-        html += "<tbody>"
-        for i, row in enumerate(rows):
-            row_class = "even" if i % 2 == 0 else "odd"
-            html += f"<tr class='{row_class}'>"
-
-            for j, cell in enumerate(row):
-                cell_val = cell if cell else ""
-                if j == 3:  # highlight NAME column
-                    html += f"<td class='name-cell'>{cell_val}</td>"
-                else:
-                    html += f"<td>{cell_val}</td>"
+        date = datetime.strptime(day, SHEET_TAB_FORMAT).date()
+    except ValueError:
+        return None
+    if date > datetime.now().date():
+        return None
+    return date.strftime(SHEET_TAB_FORMAT)
 
-            html += "</tr>"
-        html += "</tbody></table>"
-        return html
+def get_sheet_cache(tab):
+    """The cache for a daily tab (today or earlier); only today's tab stays live, earlier ones are kept as they are."""
+    today = datetime.now().strftime(SHEET_TAB_FORMAT)
+    with tab_caches_lock:
+        # a tab that was live before midnight is a past day now, whether or not anyone is viewing it
+        for t, c in tab_caches.items():
+            if c.live and t != today:
+                c.end_of_day()
+        cache = tab_caches.get(tab)
+        if cache is None:
+            cache = SheetCache(tab, CACHE_TTL, live=tab == today)
+            tab_caches[tab] = cache
+        else:
+            tab_caches.move_to_end(tab)
+        # evict the least recently viewed past days; the live tab is never evicted
+        past = [t for t, c in tab_caches.items() if not c.live and t != tab]
+        for t in past[:max(0, len(past) - TAB_CACHE_SIZE)]:
+            del tab_caches[t]
+        return cache
 
-    except Exception as e:
-        return f"<p style='color:#ffdede'>Error loading sheet:<br>{e}</p>"
+def cache_for(day):
+    tab = resolve_day(day)
+    if tab is None:
+        abort(404)
+    return get_sheet_cache(tab)
 
 # ------------------------------------------------------
-# ROUTE
+# IN-MEMORY RECORD INDEX (one per cached download)
 # ------------------------------------------------------
-@app.route('/')
-def index():
-    table_html = sheet_to_html()
-    now = datetime.now().strftime("%A, %d %B %Y  |  %I:%M:%S %p")
+PAGE_SIZE = 60  # rows per API page; the browser only ever holds one page
+MAX_PAGE_SIZE = 500
+QUERY_CACHE_SIZE = 32  # filtered/sorted row lists kept per data version
+
+# filter parameter -> sheet column header
+SEARCH_COLUMNS = {"name": "Candidate Name", "contact": "Contact Number", "entry": "Entry No"}
+
+class RecordIndex:
+    """
+    Paging, sorting and filtering over one download of the sheet.
+    Search keys are lower-cased once; sort orders and filter results are built on first use and reused
+    for the following pages of the same query.
+    """
+
+    def __init__(self, data):
+        self.header = data[0] if data else []
+        self.rows = data[1:]
+        self.lock = threading.Lock()
+        self.search_keys = {}
+        for param, title in SEARCH_COLUMNS.items():
+            if title in self.header:
+                col = self.header.index(title)
+                self.search_keys[param] = [row[col].strip().lower() if len(row) > col else "" for row in self.rows]
+        self.by_entry = {}
+        for pos, key in enumerate(self.search_keys.get("entry", [])):
+            self.by_entry.setdefault(key, pos)
+        self.sort_orders = {}
+        self.queries = OrderedDict()
+
+    def sort_order(self, col, descending):
+        key = (col, descending)
+        order = self.sort_orders.get(key)
+        if order is None:
+            def sort_key(pos):
+                cell = self.rows[pos][col] if len(self.rows[pos]) > col else ""
+                try:
+                    return (0, float(cell), "")
+                except ValueError:
+                    return (1, 0.0, cell.lower())
+            order = sorted(range(len(self.rows)), key=sort_key, reverse=descending)
+            self.sort_orders[key] = order
+        return order
+
+    def matching(self, filters, sort_col, descending):
+        """Row positions matching filters, in the requested order."""
+        cache_key = (tuple(sorted(filters.items())), sort_col, descending)
+        with self.lock:
+            positions = self.queries.get(cache_key)
+            if positions is not None:
+                self.queries.move_to_end(cache_key)
+                return positions
 
-    page = f'''<!doctype html>
+        if sort_col is not None and 0 <= sort_col < len(self.header):
+            positions = self.sort_order(sort_col, descending)
+        else:
+            positions = range(len(self.rows))
+        for param, value in filters.items():
+            value = value.strip().lower()
+            if param == "q":
+                columns = list(self.search_keys.values())
+                positions = [p for p in positions if any(value in keys[p] for keys in columns)]
+            elif param == "entry":
+                keys = self.search_keys.get("entry", [])
+                positions = [p for p in positions if keys and keys[p] == value]
+            else:
+                keys = self.search_keys.get(param, [])
+                positions = [p for p in positions if keys and value in keys[p]]
+        positions = list(positions)
+
+        with self.lock:
+            self.queries[cache_key] = positions
+            if len(self.queries) > QUERY_CACHE_SIZE:
+                self.queries.popitem(last=False)
+        return positions
+
+    def page(self, filters=None, sort_col=None, descending=False, offset=0, limit=PAGE_SIZE):
+        positions = self.matching(filters or {}, sort_col, descending)
+        offset = max(0, min(offset, len(positions)))
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        return {
+            "header": self.header,
+            "total": len(positions),
+            "offset": offset,
+            # [sheet row number (header = 1), row values]
+            "rows": [[p + 2, self.rows[p]] for p in positions[offset:offset + limit]],
+        }
+
+def record_index(snapshot):
+    # built once per data version and shared by every request
+    if snapshot.get("index") is None:
+        snapshot["index"] = RecordIndex(snapshot["data"])
+    return snapshot["index"]
+
+def parse_query(args):
+    """Reads paging/sorting/filter parameters from the request query string."""
+    filters = {p: args[p] for p in ("q",) + tuple(SEARCH_COLUMNS) if args.get(p, "").strip()}
+    try:
+        sort_col = int(args["sort"]) if args.get("sort", "") != "" else None
+    except ValueError:
+        sort_col = None
+    descending = args.get("order", "asc") == "desc"
+    try:
+        offset = int(args.get("offset", 0))
+        limit = int(args.get("limit", PAGE_SIZE))
+    except ValueError:
+        offset, limit = 0, PAGE_SIZE
+    return filters, sort_col, descending, offset, limit
+
+# ------------------------------------------------------
+# PAGE TEMPLATE (compiled once)
+# ------------------------------------------------------
+PAGE_HTML = '''<!doctype html>
 <html lang="en">
 <head>
 <meta charset="utf-8" />
 <meta name="viewport" content="width=device-width,initial-scale=1" />
 <title>KTech Candidate Record Viewer</title>
 
-<link href="https://fonts.googleapis.com/css2?family=Montserrat:wght@400;600;700;800&display=swap" rel="stylesheet">
+{%- if fonts_url %}
+<link href="{{ fonts_url }}" rel="stylesheet">
+{%- endif %}
 
 <style>
-  :root{{
+  :root{
     --bg:#0f1214;
     --panel:#15171a;
     --muted:#bfc8cc;
@@ -95,61 +378,408 @@ def index():
     --row-even:#1a1c1e;
     --name-highlight:rgba(0,191,165,0.08);
     --border:rgba(255,255,255,0.04);
-  }}
-  html,body {{
+    --row-height:44px;
+  }
+  html,body {
     margin:0;background:var(--bg);color:var(--muted);
     font-family:"Montserrat", Aptos, Segoe UI, Roboto, sans-serif;
-  }}
-  .container {{
+  }
+  .container {
     max-width:1200px;margin:32px auto;padding:28px;
     background:linear-gradient(180deg,rgba(255,255,255,0.02),rgba(255,255,255,0.01));
     border-radius:12px;box-shadow:0 8px 30px rgba(0,0,0,0.6);
     border:1px solid var(--border);
-  }}
-  h1 {{color:var(--title);margin:0;font-size:28px;font-weight:800;}}
-  .time {{color:var(--subtitle);font-weight:800;font-size:16px;}}
-  .candidate-table {{
-    width:100%;border-collapse:collapse;border-radius:12px;overflow:hidden;
-  }}
-  .candidate-table thead th {{
-    padding:14px 16px;background:rgba(255,255,255,0.03);
+  }
+  h1 {color:var(--title);margin:0;font-size:28px;font-weight:800;}
+  .time {color:var(--subtitle);font-weight:800;font-size:16px;}
+  .toolbar {display:flex;gap:8px;margin:18px 0 12px;flex-wrap:wrap;align-items:center;}
+  .toolbar input, .toolbar select {
+    background:var(--panel);color:var(--muted);border:1px solid rgba(255,255,255,0.1);
+    border-radius:6px;padding:8px 10px;font:inherit;font-size:14px;
+  }
+  .toolbar input {flex:1;min-width:180px;}
+  .count {font-size:13px;color:#777;}
+  .scroller {height:70vh;overflow-y:auto;border-radius:12px;}
+  .candidate-table {
+    width:100%;border-collapse:collapse;
+  }
+  .candidate-table thead th {
+    position:sticky;top:0;z-index:1;cursor:pointer;user-select:none;
+    padding:14px 16px;background:#1b1e21;
     color:var(--title);font-size:16px;font-weight:700;
-  }}
-  .candidate-table tbody td {{
-    padding:12px 16px;font-size:14px;white-space:nowrap;
-  }}
-  .odd {{background:var(--row-odd);}}
-  .even {{background:var(--row-even);}}
-  .name-cell {{
+  }
+  .candidate-table tbody tr {height:var(--row-height);}
+  .candidate-table tbody td {
+    padding:0 16px;font-size:14px;white-space:nowrap;overflow:hidden;text-overflow:ellipsis;
+  }
+  .candidate-table tbody tr.spacer td {padding:0;}
+  .odd {background:var(--row-odd);}
+  .even {background:var(--row-even);}
+  .name-cell {
     background:var(--name-highlight);
-    border-radius:4px;padding:10px 14px;
-  }}
+  }
 </style>
 
 <script>
-  setTimeout(() => {{ location.reload(); }}, 3000);
+  // the clock runs in the browser so the page itself only changes when the data does
+  const DAYS = ["Sunday","Monday","Tuesday","Wednesday","Thursday","Friday","Saturday"];
+  const MONTHS = ["January","February","March","April","May","June","July","August","September","October","November","December"];
+  const pad = n => String(n).padStart(2, "0");
+  function tick() {
+    const d = new Date();
+    const h = d.getHours() % 12 || 12;
+    document.getElementById("clock").textContent =
+      `${DAYS[d.getDay()]}, ${pad(d.getDate())} ${MONTHS[d.getMonth()]} ${d.getFullYear()}  |  ` +
+      `${pad(h)}:${pad(d.getMinutes())}:${pad(d.getSeconds())} ${d.getHours() < 12 ? "AM" : "PM"}`;
+  }
+
+  // virtual scrolling: only one page of rows is fetched from /api/records and kept in the DOM
+  const PAGE = {{ page_size }};
+  const BUFFER = 10;
+  const NAME_COL = 3;
+  const state = {header: [], total: 0, offset: 0, rows: [], sort: null, order: "asc", field: "q", text: ""};
+  let rowHeight = 44, requestSeq = 0, scrollQueued = false;
+
+  function params(offset) {
+    const p = new URLSearchParams({offset: Math.max(0, offset), limit: PAGE});
+    if (state.sort !== null) { p.set("sort", state.sort); p.set("order", state.order); }
+    if (state.text) p.set(state.field, state.text);
+    return p;
+  }
+  async function load(offset) {
+    const seq = ++requestSeq;
+    const res = await fetch("/api/{{ tab }}/records?" + params(offset));
+    if (!res.ok || seq !== requestSeq) return;
+    Object.assign(state, await res.json());
+    render();
+  }
+  function cell(tag, text, className) {
+    const el = document.createElement(tag);
+    el.textContent = text;
+    if (className) el.className = className;
+    return el;
+  }
+  function spacer(rows) {
+    const tr = document.createElement("tr");
+    tr.className = "spacer";
+    tr.style.height = (rows * rowHeight) + "px";
+    const td = cell("td", "");
+    td.colSpan = Math.max(1, state.header.length);
+    tr.appendChild(td);
+    return tr;
+  }
+  function render() {
+    const head = document.getElementById("head");
+    head.textContent = "";
+    state.header.forEach((col, i) => {
+      const arrow = state.sort === i ? (state.order === "desc" ? " ▼" : " ▲") : "";
+      const th = cell("th", col + arrow);
+      th.scope = "col";
+      th.onclick = () => {
+        state.order = state.sort === i && state.order === "asc" ? "desc" : "asc";
+        state.sort = i;
+        load(state.offset);
+      };
+      head.appendChild(th);
+    });
+
+    const body = document.getElementById("body");
+    body.textContent = "";
+    body.appendChild(spacer(state.offset));
+    state.rows.forEach(([sheetRow, row], i) => {
+      const tr = document.createElement("tr");
+      tr.className = (state.offset + i) % 2 === 0 ? "even" : "odd";
+      state.header.forEach((_, j) => tr.appendChild(cell("td", row[j] || "", j === NAME_COL ? "name-cell" : "")));
+      body.appendChild(tr);
+    });
+    body.appendChild(spacer(state.total - state.offset - state.rows.length));
+
+    const first = state.rows.length ? state.offset + 1 : 0;
+    document.getElementById("count").textContent =
+      state.total ? `Showing ${first}–${state.offset + state.rows.length} of ${state.total}` : "No data found.";
+  }
+  function onScroll() {
+    if (scrollQueued) return;
+    scrollQueued = true;
+    requestAnimationFrame(() => {
+      scrollQueued = false;
+      const scroller = document.getElementById("scroller");
+      const first = Math.floor(scroller.scrollTop / rowHeight);
+      const visible = Math.ceil(scroller.clientHeight / rowHeight);
+      const end = state.offset + state.rows.length;
+      if ((first - BUFFER / 2 < state.offset && state.offset > 0) ||
+          (first + visible + BUFFER / 2 > end && end < state.total)) {
+        load(first - BUFFER);
+      }
+    });
+  }
+  let searchTimer = null;
+  function onSearch() {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(() => {
+      state.text = document.getElementById("search").value.trim();
+      state.field = document.getElementById("field").value;
+      document.getElementById("scroller").scrollTop = 0;
+      load(0);
+    }, 250);
+  }
+
+  window.addEventListener("DOMContentLoaded", () => {
+    tick();
+    setInterval(tick, 1000);
+    rowHeight = parseFloat(getComputedStyle(document.documentElement).getPropertyValue("--row-height")) || 44;
+    Object.assign(state, JSON.parse(document.getElementById("initial").textContent));
+    render();
+    document.getElementById("scroller").addEventListener("scroll", onScroll);
+    document.getElementById("search").addEventListener("input", onSearch);
+    document.getElementById("field").addEventListener("change", onSearch);
+    document.getElementById("day").addEventListener("change", e => {
+      if (e.target.value) window.location = "/day/" + e.target.value;
+    });
+
+    // live updates: the server only announces new data versions; re-fetch the page being viewed
+    const poll = () => setInterval(() => load(state.offset), 3000);
+    if (window.EventSource) {
+      const source = new EventSource("/stream/{{ tab }}?notify=1&version={{ version }}");
+      source.onmessage = () => load(state.offset);
+      // closed for good when the server has no stream slot free (503): poll the API instead
+      source.onerror = () => { if (source.readyState === EventSource.CLOSED) poll(); };
+    } else {
+      poll();
+    }
+  });
 </script>
 </head>
 <body>
   <div class="container">
     <header style="display:flex;justify-content:space-between;align-items:center;">
-      <h1>🎓 KTech Candidate Records</h1>
+      <h1>🎓 KTech Candidate Records <span class="time">{{ tab }}</span></h1>
       <div>
-        <div class="time">{now}</div>
+        <div class="time" id="clock"></div>
       </div>
     </header>
 
-    <main>{table_html}</main>
+    <main>
+    {%- if error %}
+      <p style='color:#ffdede'>Error loading sheet:<br>{{ error }}</p>
+    {%- endif %}
+      <div class="toolbar">
+        <input id="day" type="date" value="{{ tab }}" title="Show another day">
+        <input id="search" type="search" placeholder="Search name, contact or entry no" autocomplete="off">
+        <select id="field">
+          <option value="q">All</option>
+          <option value="name">Name</option>
+          <option value="contact">Contact</option>
+          <option value="entry">Entry No</option>
+        </select>
+        <span class="count" id="count"></span>
+      </div>
+      <div class="scroller" id="scroller">
+        <table class="candidate-table" role="table">
+          <thead><tr id="head"></tr></thead>
+          <tbody id="body"></tbody>
+        </table>
+      </div>
+    </main>
 
     <div class="footer" style="margin-top:16px;color:#555;">
-      Data Source: <strong style="color:var(--title)">Google Sheets</strong> • Auto-refresh 3s
+      Data Source: <strong style="color:var(--title)">Google Sheets</strong> • Live updates
     </div>
   </div>
+  <script id="initial" type="application/json">{{ initial|tojson }}</script>
 </body>
 </html>
 '''
-    return render_template_string(page)
+PAGE_TEMPLATE = app.jinja_env.from_string(PAGE_HTML)
+
+def render_page(cache, snapshot):
+    # rendered once per data version and reused for every browser
+    if snapshot["page"] is None:
+        snapshot["page"] = PAGE_TEMPLATE.render(
+            tab=cache.tab,
+            fonts_url=fonts_css_url(),
+            error=snapshot["error"],
+            version=snapshot["version"],
+            page_size=PAGE_SIZE,
+            initial=record_index(snapshot).page(),
+        ).encode("utf-8")
+    return snapshot["page"]
+
+def fonts_css_url():
+    if os.path.exists(LOCAL_FONTS_CSS):
+        return "/static/fonts/montserrat.css"
+    return FONTS_CSS_URL
+
+# ------------------------------------------------------
+# RESPONSE COMPRESSION
+# ------------------------------------------------------
+compressed_bodies = OrderedDict()  # (etag, encoding) -> compressed body
+compressed_bodies_lock = threading.Lock()
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+@app.after_request
+def compress_response(response):
+    """
+    Compresses HTML and JSON with brotli (when installed) or gzip.
+    Streams (the SSE endpoint) are left alone so events are not held back.
+    Responses with an ETag are compressed once and the result reused.
+    """
+    if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+            or response.mimetype not in COMPRESSIBLE_TYPES or "Content-Encoding" in response.headers):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = request.accept_encodings.best_match(["br", "gzip"] if brotli else ["gzip"])
+    if encoding not in ("br", "gzip"):
+        return response
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_SIZE:
+        return response
+
+    etag, _ = response.get_etag()
+    key = (etag, encoding)
+    with compressed_bodies_lock:
+        data = compressed_bodies.get(key) if etag else None
+        if data is not None:
+            compressed_bodies.move_to_end(key)
+    if data is None:
+        data = compress(body, encoding)
+        if etag:
+            with compressed_bodies_lock:
+                compressed_bodies[key] = data
+                if len(compressed_bodies) > COMPRESSED_CACHE_SIZE:
+                    compressed_bodies.popitem(last=False)
+
+    response.set_data(data)
+    response.headers["Content-Encoding"] = encoding
+    if etag:
+        # the encoded body is a different byte sequence; weak ETags still match If-None-Match
+        response.set_etag(etag, weak=True)
+    return response
 
 # ------------------------------------------------------
+# ROUTES
+# ------------------------------------------------------
+@app.route('/', defaults={"day": "today"})
+@app.route('/day/<day>')
+def index(day):
+    cache = cache_for(day)
+    snapshot = cache.get()
+    response = make_response(render_page(cache, snapshot))
+    response.set_etag(snapshot["etag"])
+    response.last_modified = snapshot["last_modified"]
+    # browsers must revalidate, which is a cheap 304 while the data is unchanged
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
+@app.route('/api/records', defaults={"day": "today"})
+@app.route('/api/<day>/records')
+def api_records(day):
+    """
+    One page of records from a day's tab (today by default) as JSON.
+    Query parameters: offset, limit, sort (column index), order (asc|desc),
+    q (name, contact or entry no), name, contact, entry (exact entry number).
+    """
+    snapshot = cache_for(day).get()
+    filters, sort_col, descending, offset, limit = parse_query(request.args)
+    result = record_index(snapshot).page(filters, sort_col, descending, offset, limit)
+    result["version"] = snapshot["version"]
+    response = jsonify(result)
+    response.set_etag(hashlib.sha1(f"{snapshot['etag']}?{request.query_string.decode()}".encode("utf-8")).hexdigest())
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
+@app.route('/api/records/<entry_no>', defaults={"day": "today"})
+@app.route('/api/<day>/records/<entry_no>')
+def api_record(entry_no, day):
+    """A single record looked up by entry number."""
+    snapshot = cache_for(day).get()
+    index = record_index(snapshot)
+    pos = index.by_entry.get(entry_no.strip().lower())
+    if pos is None:
+        return jsonify({"error": f"Entry No {entry_no} not found."}), 404
+    return jsonify({"header": index.header, "row": index.rows[pos], "sheet_row": pos + 2,
+                    "version": snapshot["version"]})
+
+@app.route('/stream', defaults={"day": "today"})
+@app.route('/stream/<day>')
+def stream(day):
+    """
+    Server-Sent Events: one message per new data version, carrying only the rows that changed.
+    With ?notify=1 the message only announces the new version (used by the paged HTML view).
+    Each stream holds a server thread, so only stream_slots run at once (others get 503 and poll /api),
+    and each ends after STREAM_MAX_AGE; the browser reconnects with Last-Event-ID.
+    """
+    cache = cache_for(day)
+    notify_only = request.args.get("notify") == "1"
+    version = request.headers.get("Last-Event-ID") or request.args.get("version", "0")
+    try:
+        version = int(version)
+    except ValueError:
+        version = 0
+
+    if not stream_slots.acquire(blocking=False):
+        response = make_response("Too many live-update streams; poll /api instead.", 503)
+        response.headers["Retry-After"] = str(STREAM_MAX_AGE)
+        return response
+
+    def events(version):
+        started = last_sent = time.monotonic()
+        while time.monotonic() - started < STREAM_MAX_AGE:
+            # get() refreshes the tab's shared cache when its TTL expired; one download serves every stream
+            snapshot = cache.get()
+            if snapshot["version"] != version:
+                if notify_only:
+                    message = {"version": snapshot["version"]}
+                elif snapshot["delta"] is not None and snapshot["version"] == version + 1:
+                    message = {"rows": snapshot["delta"]}
+                else:
+                    message = {"data": snapshot["data"], "error": snapshot["error"]}
+                version = snapshot["version"]
+                last_sent = time.monotonic()
+                yield f"id: {version}\ndata: {json.dumps(message)}\n\n"
+            elif time.monotonic() - last_sent >= STREAM_KEEPALIVE:
+                last_sent = time.monotonic()
+                yield ": keepalive\n\n"
+            cache.wait_for_change(version, min(cache.ttl, STREAM_KEEPALIVE))
+
+    response = Response(events(version), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    # the server closes the response when the stream ends or the browser goes away
+    response.call_on_close(stream_slots.release)
+    return response
+
+# ------------------------------------------------------
+# SERVER
+# ------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Serve the candidate record viewer.")
+    parser.add_argument("--dev", action="store_true",
+                        help="use Flask's development server (debugger and auto-reload) instead of waitress")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--threads", type=int, default=SERVER_THREADS,
+                        help=f"worker threads; each open browser holds one for its live updates, "
+                             f"except the last {STREAM_THREAD_RESERVE}")
+    args = parser.parse_args()
+
+    global stream_slots
+    stream_slots = threading.BoundedSemaphore(max(1, args.threads - STREAM_THREAD_RESERVE))
+
+    if args.dev:
+        app.run(host=args.host, port=args.port, debug=True)
+        return
+
+    try:
+        from waitress import serve
+    except ImportError:
+        raise SystemExit("waitress is not installed: pip install waitress (or use --dev for the development server)")
+    print(f"Record Viewer serving on http://{args.host}:{args.port}/ with {args.threads} threads")
+    serve(app, host=args.host, port=args.port, threads=args.threads, ident="Record Viewer")
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=80, debug=True)
+    main()
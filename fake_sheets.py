@@ -0,0 +1,288 @@
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/.
+"""
+A local stand-in for the parts of the Google Sheets REST API (v4) the apps use, for the benchmarks.
+
+Tabs live in memory. It serves tab titles, values get / batchGet / update / append / clear, addSheet
+through batchUpdate, and an OAuth token endpoint, with an optional delay per request to mimic the
+round trip to Google. "=COUNTA(A:A)" cells (the POS row-count sentinel) are computed on read.
+An append containing a row whose Entry No (column F) is in server.reject fails with 400, like a row
+Sheets won't take.
+
+    server = FakeSheets(latency=0.15)
+    server.start()
+    server.write_credentials(folder)   # sheetsid.txt + a service_account.json whose tokens come from the fake
+    server.use()                       # points sheets_client at the fake
+
+Run on its own (python fake_sheets.py --port 8765) it writes the two files into the current folder,
+so apps started from there talk to the fake once sheets_client.API_ROOT is set to the printed URL.
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+SHEET_ID = "fake-sheet"
+
+RANGE_RE = re.compile(r"^([A-Z]*)(\d*)(?::([A-Z]*)(\d*))?$")
+
+
+def column_index(letters, default):
+    if not letters:
+        return default
+    n = 0
+    for ch in letters:
+        n = n * 26 + ord(ch) - ord("A") + 1
+    return n - 1
+
+
+def parse_range(range_name):
+    """'Tab'!A2:F -> (tab, first row, last row, first column, last column); rows and columns from 0, None = open."""
+    tab, _, cells = range_name.partition("!")
+    if tab.startswith("'") and tab.endswith("'"):
+        tab = tab[1:-1].replace("''", "'")
+    m = RANGE_RE.match(cells)
+    if not cells or not m:
+        return tab, 0, None, 0, None
+    c1, r1, c2, r2 = m.groups()
+    if c2 is None and r2 is None:  # a single cell
+        c2, r2 = c1, r1
+    return (tab, int(r1) - 1 if r1 else 0, int(r2) - 1 if r2 else None,
+            column_index(c1, 0), column_index(c2, None))
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, body, status=200):
+        out = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def error(self, status, message):
+        self.reply({"error": {"code": status, "message": message}}, status)
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def route(self, method):
+        url = urllib.parse.urlparse(self.path)
+        path = urllib.parse.unquote(url.path)
+        query = urllib.parse.parse_qs(url.query)
+        body = self.read_body()
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        if path == "/token":
+            server.count("token")
+            return self.reply({"access_token": "fake-token", "token_type": "Bearer", "expires_in": 3600})
+        prefix = f"/v4/spreadsheets/{SHEET_ID}"
+        if not path.startswith(prefix):
+            return self.error(404, "Requested entity was not found.")
+        path = path[len(prefix):]
+        server.count("writes" if method != "GET" else "reads")
+        with server.lock:
+            if method == "GET" and path == "":
+                return self.reply({"sheets": [{"properties": {"title": t}} for t in server.tabs]})
+            if method == "GET" and path == "/values:batchGet":
+                ranges = query.get("ranges", [])
+                if any(parse_range(r)[0] not in server.tabs for r in ranges):
+                    return self.error(400, "Unable to parse range")
+                return self.reply({"valueRanges": [{"range": r, "values": server.read(r)} for r in ranges]})
+            if method == "POST" and path == ":batchUpdate":
+                for req in json.loads(body).get("requests", []):
+                    title = req.get("addSheet", {}).get("properties", {}).get("title")
+                    if title in server.tabs:
+                        return self.error(400, f'A sheet with the name "{title}" already exists.')
+                    if title is not None:
+                        server.tabs[title] = []
+                return self.reply({"replies": []})
+            m = re.match(r"^/values/(.+?)(?::(append|clear))?$", path)
+            if not m:
+                return self.error(404, "Unknown method.")
+            range_name, action = m.groups()
+            if parse_range(range_name)[0] not in server.tabs:
+                return self.error(400, f"Unable to parse range: {range_name}")
+            if method == "GET" and action is None:
+                return self.reply({"range": range_name, "values": server.read(range_name)})
+            if method == "PUT" and action is None:
+                server.write(range_name, json.loads(body).get("values", []))
+                return self.reply({"updatedRange": range_name})
+            if method == "POST" and action == "append":
+                rows = json.loads(body).get("values", [])
+                if any(len(r) > 5 and str(r[5]) in server.reject for r in rows):
+                    return self.error(400, "Invalid values[0]: rejected by the test")
+                server.append(range_name, rows)
+                return self.reply({"updates": {"updatedRows": len(rows)}})
+            if method == "POST" and action == "clear":
+                server.clear(range_name)
+                return self.reply({"clearedRange": range_name})
+        return self.error(404, "Unknown method.")
+
+    def do_GET(self):
+        self.route("GET")
+
+    def do_POST(self):
+        self.route("POST")
+
+    def do_PUT(self):
+        self.route("PUT")
+
+
+class FakeSheets(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0.0):
+        super().__init__(("127.0.0.1", port), Handler)
+        self.latency = latency  # seconds added to every request
+        self.tabs = {}  # title -> rows (lists of strings)
+        self.lock = threading.Lock()
+        self.calls = Counter()  # "reads", "writes", "token"
+        self.reject = set()  # Entry Nos (as strings) whose appends are refused with 400
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    @property
+    def api_root(self):
+        return f"{self.url}/v4/spreadsheets"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def count(self, kind):
+        with self.lock:
+            self.calls[kind] += 1
+
+    # --- cell storage ---
+    def cell(self, rows, r, c):
+        value = rows[r][c] if r < len(rows) and c < len(rows[r]) else ""
+        if value == "=COUNTA(A:A)":
+            return str(sum(1 for row in rows if row and row[0] != ""))
+        return value
+
+    def read(self, range_name):
+        tab, r1, r2, c1, c2 = parse_range(range_name)
+        rows = self.tabs[tab]
+        last_row = len(rows) - 1 if r2 is None else min(r2, len(rows) - 1)
+        out = []
+        for r in range(r1, last_row + 1):
+            width = len(rows[r]) if c2 is None else min(c2 + 1, len(rows[r]))
+            row = [str(self.cell(rows, r, c)) for c in range(c1, width)]
+            while row and row[-1] == "":
+                row.pop()
+            out.append(row)
+        while out and not out[-1]:
+            out.pop()
+        return out
+
+    def write(self, range_name, values):
+        tab, r1, _, c1, _ = parse_range(range_name)
+        rows = self.tabs[tab]
+        for i, values_row in enumerate(values):
+            while len(rows) <= r1 + i:
+                rows.append([])
+            row = rows[r1 + i]
+            row.extend([""] * (c1 + len(values_row) - len(row)))
+            row[c1:c1 + len(values_row)] = ["" if v is None else str(v) for v in values_row]
+
+    def append(self, range_name, values):
+        tab, _, _, c1, c2 = parse_range(range_name)
+        rows = self.tabs[tab]
+        last = -1
+        for r, row in enumerate(rows):
+            if any(v != "" for v in (row[c1:] if c2 is None else row[c1:c2 + 1])):
+                last = r
+        start = f"{quote_column(c1)}{last + 2}"
+        self.write(f"'{tab}'!{start}", values)
+
+    def clear(self, range_name):
+        tab, r1, r2, c1, c2 = parse_range(range_name)
+        rows = self.tabs[tab]
+        for r in range(r1, len(rows) if r2 is None else min(r2 + 1, len(rows))):
+            row = rows[r]
+            for c in range(c1, len(row) if c2 is None else min(c2 + 1, len(row))):
+                row[c] = ""
+
+    # --- pointing the apps at the fake ---
+    def write_credentials(self, folder="."):
+        """Writes sheetsid.txt and a service_account.json (throwaway key) whose token URI is this server."""
+        try:
+            from cryptography.hazmat.primitives import serialization
+            from cryptography.hazmat.primitives.asymmetric import rsa
+            key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+            pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                    serialization.NoEncryption()).decode("ascii")
+        except ImportError:
+            import rsa
+            pem = rsa.newkeys(2048)[1].save_pkcs1().decode("ascii")
+        with open(os.path.join(folder, "sheetsid.txt"), "w", encoding="utf-8") as f:
+            f.write(SHEET_ID)
+        with open(os.path.join(folder, "service_account.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "type": "service_account", "project_id": "fake", "private_key_id": "fake",
+                "private_key": pem, "client_email": "bench@fake.iam.gserviceaccount.com", "client_id": "0",
+                "token_uri": f"{self.url}/token",
+            }, f)
+
+    def use(self, rate_limit=False):
+        """
+        Points sheets_client at this server (API root, no shared token cache). Unless rate_limit is set,
+        the per-minute request limit is lifted so a benchmark measures the apps, not the quota.
+        """
+        import sheets_client
+        sheets_client.API_ROOT = self.api_root
+        sheets_client.TOKEN_CACHE_FILE = None
+        sheets_client.CALL_LOG_MINUTES = False
+        sheets_client._clients.clear()
+        if rate_limit:
+            sheets_client._limiter = sheets_client.RateLimiter(state_file=None)
+        else:
+            sheets_client._limiter = sheets_client.RateLimiter(rate=10 ** 7, burst=10 ** 6, state_file=None)
+
+
+def quote_column(index):
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake Google Sheets API on localhost.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    args = parser.parse_args()
+
+    server = FakeSheets(args.port, args.latency)
+    server.write_credentials(".")
+    print(f"Fake Sheets API on {server.api_root} (sheetsid.txt and service_account.json written here)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/.
+"""
+Rows/sec benchmark for the POS upload path (SheetsOutbox + OutboxWorker) against fake_sheets.py.
+
+  burst - one registration every --interval seconds, uploaded as they come in: one append per row
+          (the old behaviour) and batched with the POS's OUTBOX_BATCH_WINDOW / OUTBOX_BATCH_ROWS;
+  drain - a backlog of --rows rows (e.g. after an outage) sent one per append and in batches;
+  reject - a backlog of 100 rows with one Sheets refuses (HTTP 400) every time.
+
+Each run checks that every row reached the sheet exactly once and in entry-number order; the reject
+run checks that the other 99 get through and the bad row is parked, not lost.
+Everything runs in a temporary folder; the real config and outbox are never touched.
+
+    python outbox_bench.py [--rows 200] [--interval 0.02] [--latency 0.15] [--quota]
+
+--quota keeps the Sheets per-minute request limit (RATE_PER_MINUTE) in force, which is what batching
+mostly saves in practice; without it the limit is lifted and only the round trips count.
+"""
+import argparse
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+
+from fake_sheets import FakeSheets
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TAB = "2000-01-01"
+
+
+def load_pos():
+    # the POS creates its config folders on import, so this runs inside the temporary folder
+    spec = importlib.util.spec_from_file_location("candidates_pos", os.path.join(HERE, "Candidates POS.py"))
+    pos = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = pos
+    spec.loader.exec_module(pos)
+    return pos
+
+
+def row(entry_no):
+    return [TAB, "Saturday", "09:00:00", f"Candidate {entry_no}", f"98765{entry_no:05d}", str(entry_no)]
+
+
+def run(pos, server, sheets, label, batch_rows, batch_window, rows, interval):
+    pos.OUTBOX_BATCH_ROWS = batch_rows
+    pos.OUTBOX_BATCH_WINDOW = batch_window
+    server.tabs[TAB] = [["Date", "Day", "Time", "Candidate Name", "Contact Number", "Entry No"]]
+    writes_before = server.calls["writes"]
+    outbox = pos.SheetsOutbox(os.path.join(tempfile.mkdtemp(dir="."), "outbox.db"))
+    worker = pos.OutboxWorker(sheets, outbox)
+    start = time.perf_counter()
+    if interval is None:
+        for n in range(1, rows + 1):
+            outbox.add(TAB, n, row(n))
+        worker.start()
+    else:
+        worker.start()
+        for n in range(1, rows + 1):
+            outbox.add(TAB, n, row(n))
+            worker.wake()
+            time.sleep(interval)
+    while outbox.pending_count():
+        time.sleep(0.005)
+    elapsed = time.perf_counter() - start
+    sent = [int(r[5]) for r in server.tabs[TAB][1:] if len(r) > 5]
+    ok = sent == list(range(1, rows + 1))
+    print(f"{label:<34}{rows / elapsed:>9.1f} rows/s  {elapsed:>7.2f} s  "
+          f"{server.calls['writes'] - writes_before:>4} appends  {'in order, no duplicates' if ok else 'MISMATCH'}")
+    return ok
+
+
+def run_rejected(pos, server, sheets, bad=37, rows=100):
+    """One permanently bad row in a backlog: the rest must still reach the sheet, the bad one stays parked."""
+    pos.OUTBOX_BATCH_ROWS = 50
+    pos.OUTBOX_BATCH_WINDOW = 0
+    server.tabs[TAB] = [["Date", "Day", "Time", "Candidate Name", "Contact Number", "Entry No"]]
+    server.reject = {str(bad)}
+    outbox = pos.SheetsOutbox(os.path.join(tempfile.mkdtemp(dir="."), "outbox.db"))
+    for n in range(1, rows + 1):
+        outbox.add(TAB, n, row(n))
+    worker = pos.OutboxWorker(sheets, outbox)
+    start = time.perf_counter()
+    worker.start()
+    deadline = time.monotonic() + 60
+    while outbox.pending_count() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    elapsed = time.perf_counter() - start
+    server.reject = set()
+    sent = [int(r[5]) for r in server.tabs[TAB][1:] if len(r) > 5]
+    parked = outbox.status()[4]
+    ok = sent == [n for n in range(1, rows + 1) if n != bad] and parked == 1
+    print(f"{f'reject, Entry No {bad} of {rows} refused':<34}{len(sent):>6} sent  {elapsed:>7.2f} s  "
+          f"{parked:>4} parked   {'others all sent in order' if ok else 'MISMATCH'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rows/sec of the POS Sheets upload against a local fake API.")
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.02, help="seconds between registrations in the burst")
+    parser.add_argument("--latency", type=float, default=0.15, help="seconds the fake API takes per request")
+    parser.add_argument("--quota", action="store_true", help="keep the per-minute Sheets request limit")
+    args = parser.parse_args()
+
+    server = FakeSheets(latency=args.latency).start()
+    ok = True
+    with tempfile.TemporaryDirectory() as folder:
+        os.chdir(folder)
+        server.write_credentials(folder)
+        server.use(rate_limit=args.quota)
+        pos = load_pos()
+        server.tabs[TAB] = []
+        sheets = pos.SheetsHandler()
+        window, batch = pos.OUTBOX_BATCH_WINDOW, pos.OUTBOX_BATCH_ROWS
+        print(f"{args.rows} rows, {args.latency * 1000:.0f} ms per request"
+              f"{', per-minute limit on' if args.quota else ''}")
+        ok &= run(pos, server, sheets, "burst, one append per row", 1, 0, args.rows, args.interval)
+        ok &= run(pos, server, sheets, f"burst, batched ({window} s / {batch} rows)", batch, window, args.rows, args.interval)
+        ok &= run(pos, server, sheets, "drain, one append per row", 1, 0, args.rows, None)
+        ok &= run(pos, server, sheets, f"drain, batched ({batch} rows)", batch, window, args.rows, None)
+        ok &= run_rejected(pos, server, sheets)
+        os.chdir(HERE)
+    server.stop()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
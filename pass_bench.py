@@ -0,0 +1,114 @@
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/.
+"""
+Per-pass timing of the POS entry pass PDF, before and after the QR code stopped going through disk:
+  before - the old create_ticket_pdf, kept below: qrcode.make() with default settings saved to
+           temp_qr.png, drawn from the file, then deleted;
+  after  - the POS's current path (new_ticket_canvas + draw_ticket_page: QR built in memory,
+           font registered once), with the POS's QR_MASK_PATTERN;
+  mask N - the same with QR_MASK_PATTERN = N (--mask), i.e. a fixed mask instead of qrcode's search.
+Passes are written to a temporary folder. Needs reportlab, qrcode and pillow.
+
+    python pass_bench.py [--passes 200] [--mask 0]
+"""
+import argparse
+import importlib.util
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_pos():
+    spec = importlib.util.spec_from_file_location("candidates_pos", os.path.join(HERE, "Candidates POS.py"))
+    pos = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = pos
+    spec.loader.exec_module(pos)
+    return pos
+
+
+def legacy_ticket_pdf(filepath, font, name, contact_number, entry_no, date, day, time_str):
+    """create_ticket_pdf as it was before the change (temp_qr.png in the working folder)."""
+    import qrcode
+    from reportlab.lib.units import cm
+    from reportlab.pdfgen import canvas
+
+    width = 8 * cm
+    height = 8 * cm
+    c = canvas.Canvas(filepath, pagesize=(width, height))
+    qr_text = f"Entry No: {entry_no}\nName: {name}\nContact: {contact_number}\nDate: {date} ({day})\nTime: {time_str}"
+    qr_img = qrcode.make(qr_text)
+    qr_temp = "temp_qr.png"
+    qr_img.save(qr_temp)
+
+    c.setFont(font, 16)
+    c.setFillColorRGB(0, 0, 0)
+    c.drawCentredString(width / 2, height - 30, "KTech")
+    c.setFont(font, 10)
+    c.drawCentredString(width / 2, height - 50, f"{date} ({day}) | {time_str}")
+    c.setFont(font, 10)
+    c.drawString(20, height - 80, f"Name: {name}")
+    c.drawString(20, height - 110, f"Number: {contact_number}")
+    c.drawString(20, height - 140, f"Entry No: {entry_no}")
+    c.drawImage(qr_temp, width - 90, 20, width=70, height=70)
+    c.setFont(font, 8)
+    c.drawCentredString(width / 2, 10, "Scan for interview info")
+    c.showPage()
+    c.save()
+    os.remove(qr_temp)
+
+
+def current_ticket_pdf(pos):
+    def create(filepath, font, name, contact_number, entry_no, date, day, time_str):
+        c = pos.new_ticket_canvas(filepath)
+        pos.draw_ticket_page(c, font, name, contact_number, entry_no, date, day, time_str)
+        c.save()
+    return create
+
+
+def time_passes(create, font, folder, passes):
+    timings = []
+    sizes = []
+    for n in range(1, passes + 1):
+        path = os.path.join(folder, f"Entry_{n}.pdf")
+        start = time.perf_counter()
+        create(path, font, f"Candidate {n}", f"98765{n:05d}", n, "2000-01-01", "Saturday", "09:00:00")
+        timings.append((time.perf_counter() - start) * 1000)
+        sizes.append(os.path.getsize(path))
+    return timings, sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time entry pass PDF generation before and after the in-memory QR change.")
+    parser.add_argument("--passes", type=int, default=200)
+    parser.add_argument("--mask", type=int, choices=range(8), help="also time passes with this fixed QR mask")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        os.chdir(folder)
+        pos = load_pos()
+        start = time.perf_counter()
+        font = pos.register_pdf_font()
+        print(f"font registration (once per process): {(time.perf_counter() - start) * 1000:.1f} ms")
+        # one untimed pass each, so lazy imports are not counted
+        for create in (legacy_ticket_pdf, current_ticket_pdf(pos)):
+            time_passes(create, font, folder, 1)
+        print(f"{'':<8}{'median':>10}{'p90':>10}{'mean':>10}{'size':>10}   ({args.passes} passes)")
+        runs = [("before", legacy_ticket_pdf, pos.QR_MASK_PATTERN), ("after", current_ticket_pdf(pos), pos.QR_MASK_PATTERN)]
+        if args.mask is not None:
+            runs.append((f"mask {args.mask}", current_ticket_pdf(pos), args.mask))
+        for label, create, mask in runs:
+            pos.QR_MASK_PATTERN = mask
+            timings, sizes = time_passes(create, font, folder, args.passes)
+            timings.sort()
+            print(f"{label:<8}{statistics.median(timings):>8.1f}ms{timings[int(len(timings) * 0.9)]:>8.1f}ms"
+                  f"{statistics.mean(timings):>8.1f}ms{statistics.mean(sizes) / 1024:>8.1f}KB")
+        os.chdir(HERE)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,551 @@
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/.
+"""
+Shared called-token state for the Interview Room panels and the Central Display.
+
+Called tokens live in an append-only journal (queue_state.jsonl, one JSON record per line) on top of a
+compacted snapshot (queue_state.json, the original {"called_tokens": [...]} format). Rooms append one
+line per call and readers only parse the lines added since their last refresh.
+
+The first line of the journal is a header {"generation": N}. Compaction and reset write a new snapshot
+and start a new journal with a different generation, which tells readers to reload from the snapshot.
+
+Every write happens while holding a cross-process lock on queue_state.lock, so rooms pressing "Call Next"
+at the same moment can never claim the same token. Snapshot and journal replacements are written to a
+temp file and renamed into place, so readers never see a half-written file.
+
+Optionally the same state can live in a SQLite database (queue_state.db, WAL mode) that also records
+room status (shown on the Central Display) and the current token per room. Put "sqlite" in queue_backend.txt to use it; without the
+file (or with "json") the journal above is used.
+
+Command line:
+    python queue_store.py compact [--today-only]   fold the journal into the snapshot
+    python queue_store.py convert                  one-shot upgrade of an old queue_state.json
+                                                   (with the sqlite backend: import the JSON state)
+    python queue_store.py reset                    clear all called tokens (what ClearQueueJSON.bat did)
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+SNAPSHOT_FILE = "queue_state.json"
+JOURNAL_FILE = "queue_state.jsonl"
+LOCK_FILE = "queue_state.lock"
+SQLITE_FILE = "queue_state.db"
+BACKEND_FILE = "queue_backend.txt"   # "json" (default) or "sqlite"
+
+ROOM_OPEN = "open"
+ROOM_CLOSED = "closed"
+ROOM_WAITING = "waiting"
+
+
+class QueueLock:
+    """Exclusive lock shared by every process (and thread) that opens the same lock file."""
+
+    def __init__(self, path=LOCK_FILE):
+        self.path = path
+        self.fd = None
+
+    def __enter__(self):
+        self.fd = open(self.path, "a+b")
+        if os.name == "nt":
+            self.fd.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self.fd.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after ~10 s; keep waiting
+                    continue
+        else:
+            fcntl.flock(self.fd.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if os.name == "nt":
+                self.fd.seek(0)
+                msvcrt.locking(self.fd.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self.fd.fileno(), fcntl.LOCK_UN)
+        finally:
+            self.fd.close()
+            self.fd = None
+
+
+def atomic_write(path, data, mode=0o666):
+    """Writes bytes to a temp file next to path and renames it over path (mode: permissions of a new file)."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with os.fdopen(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode), "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    for attempt in range(50):
+        try:
+            os.replace(tmp_path, path)
+            return
+        except PermissionError:
+            # Windows refuses while a reader has the file open; it is only held briefly
+            time.sleep(0.02)
+    os.replace(tmp_path, path)
+
+
+class QueueJournal:
+    def __init__(self, snapshot_file=SNAPSHOT_FILE, journal_file=JOURNAL_FILE, lock_file=LOCK_FILE):
+        self.snapshot_file = snapshot_file
+        self.journal_file = journal_file
+        self.lock_file = lock_file
+
+        # In-memory view, kept up to date by refresh()
+        self.called_tokens = []         # every called record, in call order
+        self.called_set = set()         # tokens already called (for call_next)
+        self.latest_per_counter = {}    # counter -> latest record (for the Central Display)
+        self.room_states = {}           # room status is only tracked by the SQLite backend
+
+        self.generation = None
+        self.offset = 0                 # byte offset of the next unread journal line
+        self.stat_key = None            # (size, mtime) of the journal at the last refresh
+
+        self.convert_legacy_state()
+
+    # --- Writers ---
+    def claim_next(self, tokens, counter):
+        """
+        Atomically calls the first token in tokens (dicts with "token", "name", "time") that no room
+        has called yet, recording it for counter. Returns the claimed token dict, or None.
+        """
+        with QueueLock(self.lock_file):
+            self.refresh()
+            for t in tokens:
+                if t.get("token") and t.get("token") not in self.called_set:
+                    self._append_line({
+                        "token": t.get("token"),
+                        "name": t.get("name"),
+                        "counter": counter,
+                        "time": t.get("time"),
+                        "called_at": datetime.now().isoformat()
+                    })
+                    self.refresh()
+                    return t
+        return None
+
+    def append(self, record):
+        """Appends one called-token record to the journal."""
+        with QueueLock(self.lock_file):
+            self._append_line(record)
+
+    def compact(self, today_only=False):
+        """
+        Folds the journal into a new snapshot and starts an empty journal.
+        With today_only, records whose called_at is not today are dropped.
+        Returns the number of records kept.
+        """
+        with QueueLock(self.lock_file):
+            self.refresh()
+            records = self.called_tokens
+            if today_only:
+                today = datetime.now().strftime("%Y-%m-%d")
+                records = [r for r in records if str(r.get("called_at", "")).startswith(today)]
+            self._start_generation(records)
+        return len(records)
+
+    def reset(self):
+        """Clears every called token."""
+        with QueueLock(self.lock_file):
+            self._start_generation([])
+
+    def set_room_status(self, counter, status, current_token=None):
+        # room status is only tracked by the SQLite backend
+        pass
+
+    def convert_legacy_state(self):
+        """
+        One-shot converter from the old single-file format. If there is no journal yet, the existing
+        queue_state.json becomes the snapshot of a new generation. Returns True if a conversion ran.
+        """
+        if os.path.exists(self.journal_file):
+            return False
+        with QueueLock(self.lock_file):
+            # another process may have converted while we waited for the lock
+            if os.path.exists(self.journal_file):
+                return False
+            snapshot = self._read_snapshot()
+            self._start_generation(snapshot.get("called_tokens", []))
+        return True
+
+    # --- Readers ---
+    def refresh(self):
+        """
+        Reads journal lines written since the last refresh.
+        Returns True if the called-token state changed.
+        """
+        # fast path: an unchanged journal costs a single stat() call
+        try:
+            st = os.stat(self.journal_file)
+        except FileNotFoundError:
+            return False
+        stat_key = (st.st_size, st.st_mtime_ns)
+        if stat_key == self.stat_key and self.generation is not None:
+            return False
+
+        changed = False
+        try:
+            with open(self.journal_file, "rb") as f:
+                header = f.readline()
+                generation = self._parse_header(header)
+                size = os.fstat(f.fileno()).st_size
+                if generation != self.generation or size < self.offset:
+                    # compacted or reset by another process: start over from the snapshot
+                    if not self._load_snapshot(generation):
+                        return False
+                    self.offset = len(header)
+                    changed = True
+                f.seek(self.offset)
+                data = f.read()
+                self.stat_key = (size, os.fstat(f.fileno()).st_mtime_ns)
+        except FileNotFoundError:
+            return False
+
+        # only consume complete lines; a writer may be half way through the last one
+        end = data.rfind(b"\n")
+        if end < 0:
+            return changed
+        for line in data[:end + 1].splitlines():
+            if not line.strip():
+                continue
+            try:
+                self._apply(json.loads(line))
+            except ValueError:
+                print("Skipping malformed queue journal line:", line[:80])
+                continue
+            changed = True
+        self.offset += end + 1
+        return changed
+
+    # --- Internals ---
+    def _append_line(self, record):
+        # callers hold the lock; one small O_APPEND write per record
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with open(self.journal_file, "ab") as f:
+            f.write(line.encode("utf-8"))
+
+    def _apply(self, record):
+        self.called_tokens.append(record)
+        self.called_set.add(record.get("token"))
+        counter = record.get("counter")
+        if counter:
+            self.latest_per_counter[counter] = record
+
+    def _load_snapshot(self, generation):
+        snapshot = self._read_snapshot()
+        if snapshot.get("generation", 0) != generation:
+            # snapshot and journal are from different generations (compaction in progress)
+            return False
+        self.called_tokens = []
+        self.called_set = set()
+        self.latest_per_counter = {}
+        for record in snapshot.get("called_tokens", []):
+            self._apply(record)
+        self.generation = generation
+        return True
+
+    def _read_snapshot(self):
+        try:
+            with open(self.snapshot_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {"called_tokens": []}
+
+    def _parse_header(self, line):
+        try:
+            return json.loads(line).get("generation", 0)
+        except (ValueError, AttributeError):
+            return 0
+
+    def _start_generation(self, records):
+        # callers hold the lock; the snapshot goes first so it is never older than the journal
+        generation = self._read_snapshot().get("generation", 0) + 1
+        snapshot = {"generation": generation, "called_tokens": records}
+        atomic_write(self.snapshot_file, json.dumps(snapshot, indent=2).encode("utf-8"))
+        atomic_write(self.journal_file, (json.dumps({"generation": generation}) + "\n").encode("utf-8"))
+        # force the next refresh to reload from the new snapshot
+        self.generation = None
+        self.offset = 0
+
+
+class SqliteQueueStore:
+    """
+    SQLite (WAL) backend with the same interface as QueueJournal.
+    Calls are claimed inside a write transaction, and the latest token per room comes from an indexed
+    query instead of a scan over every called token.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS called_tokens (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            token TEXT NOT NULL,
+            name TEXT,
+            counter TEXT NOT NULL,
+            time TEXT,
+            called_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_called_tokens_token ON called_tokens (token);
+        CREATE INDEX IF NOT EXISTS idx_called_tokens_counter ON called_tokens (counter, id);
+        CREATE TABLE IF NOT EXISTS rooms (
+            counter TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            current_token TEXT,
+            updated_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0);
+    """
+
+    # one index seek per room rather than a scan over every called token
+    LATEST_PER_COUNTER = """
+        SELECT c.token, c.name, c.counter, c.time, c.called_at
+        FROM rooms r
+        JOIN called_tokens c ON c.id = (SELECT MAX(id) FROM called_tokens WHERE counter = r.counter)
+        ORDER BY r.rowid
+    """
+
+    def __init__(self, db_file=SQLITE_FILE):
+        self.db_file = db_file
+        # autocommit mode; transactions are opened explicitly with BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(db_file, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+
+        self.called_tokens = []
+        self.called_set = set()
+        self.latest_per_counter = {}
+        self.room_states = {}           # counter -> ROOM_OPEN / ROOM_CLOSED / ROOM_WAITING
+
+        self.generation = None
+        self.last_id = 0
+        self.latest_stale = True        # latest_per_counter needs re-querying
+        self.data_version = None        # PRAGMA data_version at the last refresh (None after own writes)
+
+    # --- Writers ---
+    def claim_next(self, tokens, counter):
+        """Same contract as QueueJournal.claim_next, inside a single write transaction."""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._read_new_rows()
+            for t in tokens:
+                if t.get("token") and t.get("token") not in self.called_set:
+                    now = datetime.now().isoformat()
+                    self.conn.execute(
+                        "INSERT INTO called_tokens (token, name, counter, time, called_at) VALUES (?, ?, ?, ?, ?)",
+                        (t.get("token"), t.get("name"), counter, t.get("time"), now)
+                    )
+                    self.data_version = None
+                    self._upsert_room(counter, ROOM_OPEN, t.get("token"), now)
+                    self.conn.execute("COMMIT")
+                    self.refresh()
+                    return t
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return None
+
+    def append(self, record):
+        """Appends one called-token record."""
+        called_at = record.get("called_at") or datetime.now().isoformat()
+        self.conn.execute(
+            "INSERT INTO called_tokens (token, name, counter, time, called_at) VALUES (?, ?, ?, ?, ?)",
+            (record.get("token"), record.get("name"), record.get("counter"), record.get("time"), called_at)
+        )
+        self._upsert_room(record.get("counter"), ROOM_OPEN, record.get("token"), called_at)
+
+    def compact(self, today_only=False):
+        """Drops tokens called on previous days (with today_only). Returns the number of records kept."""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            if today_only:
+                today = datetime.now().strftime("%Y-%m-%d")
+                self.conn.execute("DELETE FROM called_tokens WHERE called_at NOT LIKE ?", (today + "%",))
+                self._bump_generation()
+            kept = self.conn.execute("SELECT COUNT(*) FROM called_tokens").fetchone()[0]
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return kept
+
+    def reset(self):
+        """Clears every called token and room status."""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute("DELETE FROM called_tokens")
+            self.conn.execute("DELETE FROM rooms")
+            self._bump_generation()
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def set_room_status(self, counter, status, current_token=None):
+        """Records a room as open, closed or waiting, with the token it is currently serving."""
+        self._upsert_room(counter, status, current_token, datetime.now().isoformat())
+
+    def room_status(self):
+        """Returns {counter: {"status", "current_token", "updated_at"}}."""
+        rows = self.conn.execute("SELECT counter, status, current_token, updated_at FROM rooms").fetchall()
+        return {r["counter"]: dict(r) for r in rows}
+
+    def convert_legacy_state(self):
+        """Imports the JSON queue state into an empty database. Returns True if anything was imported."""
+        if self.conn.execute("SELECT 1 FROM called_tokens LIMIT 1").fetchone():
+            return False
+        journal = QueueJournal()
+        journal.refresh()
+        if not journal.called_tokens:
+            return False
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            for record in journal.called_tokens:
+                self.append(record)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return True
+
+    # --- Readers ---
+    def refresh(self):
+        """
+        Picks up rows added since the last refresh. Returns True if the called-token state or a room's
+        status changed.
+        """
+        # fast path: data_version only moves when another connection commits
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self.data_version and not self.latest_stale:
+            return False
+        self.data_version = data_version
+        changed = self._read_new_rows() or self.latest_stale
+        room_states = {counter: room["status"] for counter, room in self.room_status().items()}
+        if room_states != self.room_states:
+            self.room_states = room_states
+            changed = True
+        if self.latest_stale:
+            self.latest_per_counter = {
+                r["counter"]: dict(r) for r in self.conn.execute(self.LATEST_PER_COUNTER)
+            }
+            self.latest_stale = False
+        return changed
+
+    # --- Internals ---
+    def _read_new_rows(self):
+        changed = False
+        generation = self.conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+        if generation != self.generation:
+            # reset or compacted by another process: start over
+            self.called_tokens = []
+            self.called_set = set()
+            self.latest_per_counter = {}
+            self.generation = generation
+            self.last_id = 0
+            changed = True
+        rows = self.conn.execute(
+            "SELECT id, token, name, counter, time, called_at FROM called_tokens WHERE id > ? ORDER BY id",
+            (self.last_id,)
+        ).fetchall()
+        for r in rows:
+            record = dict(r)
+            self.last_id = record.pop("id")
+            self.called_tokens.append(record)
+            self.called_set.add(record["token"])
+            changed = True
+        if changed:
+            self.latest_stale = True
+        return changed
+
+    def _upsert_room(self, counter, status, current_token, updated_at):
+        self.data_version = None
+        self.conn.execute(
+            "INSERT INTO rooms (counter, status, current_token, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (counter) DO UPDATE SET status = excluded.status, "
+            "current_token = excluded.current_token, updated_at = excluded.updated_at",
+            (counter, status, current_token, updated_at)
+        )
+
+    def _bump_generation(self):
+        self.data_version = None
+        self.conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+
+
+def read_backend():
+    try:
+        with open(BACKEND_FILE, "r", encoding="utf-8") as f:
+            return f.read().strip().lower() or "json"
+    except FileNotFoundError:
+        return "json"
+
+
+def open_queue_store():
+    """Opens the queue state backend selected in queue_backend.txt (JSON journal by default)."""
+    backend = read_backend()
+    if backend == "sqlite":
+        return SqliteQueueStore()
+    if backend != "json":
+        raise ValueError(f"{BACKEND_FILE}: unknown queue backend '{backend}' (use json or sqlite).")
+    return QueueJournal()
+
+
+# --- Command line maintenance ---
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the shared called-token queue state.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    compact = sub.add_parser("compact", help="fold the journal into the snapshot")
+    compact.add_argument("--today-only", action="store_true", help="drop tokens called on previous days")
+    sub.add_parser("convert", help="upgrade an old queue_state.json to snapshot + journal")
+    sub.add_parser("reset", help="clear all called tokens")
+    args = parser.parse_args()
+
+    store = open_queue_store()
+    if isinstance(store, SqliteQueueStore):
+        if args.command == "compact":
+            kept = store.compact(today_only=args.today_only)
+            print(f"{SQLITE_FILE} compacted ({kept} called tokens kept).")
+        elif args.command == "convert":
+            imported = store.convert_legacy_state()
+            store.refresh()
+            if imported:
+                print(f"Imported {len(store.called_tokens)} called tokens into {SQLITE_FILE}.")
+            else:
+                print(f"{SQLITE_FILE} already has data or there was nothing to import.")
+        elif args.command == "reset":
+            store.reset()
+            print(f"{SQLITE_FILE} has been reset successfully.")
+        return
+
+    if args.command == "compact":
+        kept = store.compact(today_only=args.today_only)
+        print(f"{JOURNAL_FILE} compacted into {SNAPSHOT_FILE} ({kept} called tokens kept).")
+    elif args.command == "convert":
+        # QueueJournal() already converts on first use; report what it found
+        store.refresh()
+        print(f"{SNAPSHOT_FILE} uses the journal format ({len(store.called_tokens)} called tokens).")
+    elif args.command == "reset":
+        store.reset()
+        print(f"{SNAPSHOT_FILE} and {JOURNAL_FILE} have been reset successfully.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/.
+"""
+Stress test for queue_store.py: many simulated Interview Rooms press "Call Next" as fast as they can,
+each in its own process, until every token has been called. Afterwards every token must have been
+called exactly once. With the JSON backend another process keeps compacting the journal meanwhile.
+
+The state files are created in a temporary folder; the real queue state is never touched.
+
+    python queue_stress.py [--rooms 12] [--tokens 600] [--backend json|sqlite|both]
+
+Exits with status 1 if any token was called twice or never called.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from multiprocessing import Process
+
+from queue_store import QueueJournal, SqliteQueueStore, SNAPSHOT_FILE, JOURNAL_FILE, LOCK_FILE, SQLITE_FILE
+
+
+def open_store(backend, folder):
+    if backend == "sqlite":
+        return SqliteQueueStore(os.path.join(folder, SQLITE_FILE))
+    return QueueJournal(os.path.join(folder, SNAPSHOT_FILE), os.path.join(folder, JOURNAL_FILE),
+                        os.path.join(folder, LOCK_FILE))
+
+
+def make_tokens(count):
+    return [{"token": str(i), "name": f"Candidate {i}", "time": "09:00:00"} for i in range(1, count + 1)]
+
+
+def room(backend, folder, counter, token_count):
+    store = open_store(backend, folder)
+    tokens = make_tokens(token_count)
+    while store.claim_next(tokens, counter):
+        pass
+
+
+def compactor(backend, folder, rounds):
+    store = open_store(backend, folder)
+    for _ in range(rounds):
+        store.compact()
+        time.sleep(0.01)
+
+
+def run(backend, rooms, token_count):
+    with tempfile.TemporaryDirectory() as folder:
+        open_store(backend, folder)  # create the state files before the rooms race for them
+        procs = [Process(target=room, args=(backend, folder, f"Room {n}", token_count)) for n in range(1, rooms + 1)]
+        if backend == "json":
+            procs.append(Process(target=compactor, args=(backend, folder, 30)))
+        start = time.perf_counter()
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        store = open_store(backend, folder)
+        store.refresh()
+        called = Counter(r["token"] for r in store.called_tokens)
+        rooms_used = len({r["counter"] for r in store.called_tokens})
+        if backend == "sqlite":
+            store.conn.close()
+
+    duplicates = sum(n - 1 for n in called.values())
+    missing = token_count - len(called)
+    crashed = sum(1 for p in procs if p.exitcode != 0)
+    print(f"{backend:>6}: {rooms} rooms, {sum(called.values())} calls in {elapsed:.2f}s "
+          f"({rooms_used} rooms got tokens), duplicates={duplicates}, missing={missing}, crashed={crashed}")
+    return duplicates == 0 and missing == 0 and crashed == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Call every token from many rooms at once and check for duplicates.")
+    parser.add_argument("--rooms", type=int, default=12, help="simulated rooms, one process each (default 12)")
+    parser.add_argument("--tokens", type=int, default=600, help="tokens in the list (default 600)")
+    parser.add_argument("--backend", choices=["json", "sqlite", "both"], default="both")
+    args = parser.parse_args()
+
+    backends = ["json", "sqlite"] if args.backend == "both" else [args.backend]
+    ok = all([run(backend, args.rooms, args.tokens) for backend in backends])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
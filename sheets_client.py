@@ -0,0 +1,491 @@
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/.
+"""
+Google Sheets access shared by the POS, the Interview Rooms, the Central Display and the Record Viewer.
+
+Each process holds one SheetsClient per access level (get_client()): a single authorized HTTP session
+with keep-alive and a connection pool, safe to use from several threads at once. Requests go straight to
+the Sheets REST API (v4), so there is no discovery document to download and no per-call client setup.
+
+Every request first takes a slot from a token bucket (RateLimiter) so the apps stay under the Sheets
+per-minute quotas; reads and writes have a bucket each, as Sheets counts them separately. Requests rejected with 429 (quota) or, when safe to
+repeat, 5xx / network errors are retried with exponential backoff and jitter.
+
+The POS keeps two sentinel cells on each daily tab (SENTINEL_CELLS): a revision it bumps whenever it
+clears the rows, and a row count the sheet computes itself. Readers check them with TabVersion and only
+download the rows when they moved, so a poll with nothing new costs a few hundred bytes; a download that
+is needed anyway (the first one) fetches the cells and the rows in one batchGet.
+
+Access tokens are kept in TOKEN_CACHE_FILE (readable by the owner only), so apps started on the same
+machine within the hour reuse one token instead of each exchanging the service account key at startup.
+
+Errors from the API come back as SheetsError, which carries the HTTP status (None for network errors).
+"""
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import requests
+from requests.adapters import HTTPAdapter
+from google.auth.transport.requests import AuthorizedSession, Request
+from google.oauth2.service_account import Credentials
+
+from queue_store import atomic_write, QueueLock
+
+SHEETS_ID_FILE = "sheetsid.txt"
+SERVICE_ACCOUNT_FILE = "service_account.json"
+
+API_ROOT = "https://sheets.googleapis.com/v4/spreadsheets"
+SCOPES_READONLY = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
+SCOPES_READWRITE = ["https://www.googleapis.com/auth/spreadsheets"]
+
+TIMEOUT = (10, 30)  # seconds to connect / to wait for a response
+POOL_SIZE = 8  # kept-alive connections per client (threads beyond this wait for a free one)
+
+TOKEN_CACHE_FILE = os.path.join("config", "sheets_token.json")  # access tokens shared by the apps; None disables
+TOKEN_MIN_LIFETIME = 300  # seconds; a cached token closer than this to expiry is not reused
+
+# Sheets allows 60 read and 60 write requests per minute for one account (the service account every app uses)
+RATE_PER_MINUTE = 60  # reads per minute, and writes per minute, for this process or all apps sharing RATE_STATE_FILE
+RATE_BURST = 10  # reads (or writes) that may go out back to back after a quiet spell
+RATE_STATE_FILE = os.path.join("config", "sheets_rate.json")  # buckets shared by apps in this folder; None = per process
+READ_WAIT_MAX = 10  # seconds a read waits for a slot before failing with status 429
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRIES = 4
+BACKOFF_BASE = 1  # seconds before the first retry at most; doubles with every retry
+BACKOFF_MAX = 32  # seconds between retries at most
+
+# adaptive polling (AdaptiveInterval), used by the apps that watch the sheet for new registrations
+POLL_FAST = 0.5  # seconds to the next poll right after a change, or when someone is waiting (hurry())
+POLL_FAST_COUNT = 1  # polls at POLL_FAST before going back to POLL_BASE
+POLL_BASE = 3  # seconds between polls while changes are recent
+POLL_IDLE_AFTER = 60  # seconds without a change after which polls start slowing down
+POLL_SLOW = 30  # seconds between polls at most (reached by doubling POLL_BASE)
+
+CALL_LOG_MINUTES = True  # print each minute's API call counts to the console
+
+# sentinel cells on every daily tab, next to the A:F data: H1 = revision, I1 = row count (incl. header)
+SENTINEL_CELLS = "H1:I1"
+SENTINEL_ROW_COUNT = "=COUNTA(A:A)"  # recomputed by Sheets on every append, so appends need no extra write
+SENTINEL_RECHECK = 300  # seconds; rows are downloaded at least this often anyway (catches edits by hand)
+
+
+def utcnow():
+    """Naive UTC time, the form google-auth uses for token expiry."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class SheetsError(RuntimeError):
+    """A Sheets API call failed; status is the HTTP status code, or None if the server wasn't reached."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class RateLimiter:
+    """
+    Token buckets for Sheets requests, one for reads and one for writes, since Sheets counts them
+    against separate quotas: RATE_PER_MINUTE of each on average, bursts of up to RATE_BURST.
+    Reads never spend the writes' budget, so displays polling the sheet can't hold up the POS.
+    With state_file set, the buckets live in that file under a QueueLock, so every app started from the
+    same folder draws from one budget; if the file can't be used, the buckets fall back to this process.
+    """
+
+    KINDS = ("reads", "writes")
+
+    def __init__(self, rate=RATE_PER_MINUTE, burst=RATE_BURST, state_file=RATE_STATE_FILE):
+        self.rate = rate / 60
+        self.burst = burst
+        self.state_file = state_file
+        now = time.time()
+        self.buckets = {kind: [burst, now] for kind in self.KINDS}  # kind -> [tokens, updated]
+        self.lock = threading.Lock()
+
+    def acquire(self, write, timeout=None):
+        """Takes one slot, waiting as long as needed (at most timeout seconds); False if it timed out."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        kind = "writes" if write else "reads"
+        while True:
+            with self.lock:
+                wait = self._take(kind)
+            if wait <= 0:
+                return True
+            if deadline is not None:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return False
+                wait = min(wait, left)
+            time.sleep(wait)
+
+    def _take(self, kind):
+        """Takes a slot of kind if one is free; otherwise returns the seconds until one will be."""
+        if not self.state_file:
+            return self._take_slot(kind)
+        try:
+            os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+            with QueueLock(f"{self.state_file}.lock"):
+                try:
+                    with open(self.state_file, "r", encoding="utf-8") as f:
+                        state = json.load(f)
+                    self.buckets = {k: [float(state[k]["tokens"]), float(state[k]["updated"])] for k in self.KINDS}
+                except (OSError, ValueError, KeyError, TypeError):
+                    pass  # new, damaged or single-bucket file: start from this process's buckets
+                wait = self._take_slot(kind)
+                with open(self.state_file, "w", encoding="utf-8") as f:
+                    json.dump({k: {"tokens": t, "updated": u} for k, (t, u) in self.buckets.items()}, f)
+                return wait
+        except OSError as e:
+            print("Sheets rate limit file not usable, limiting this app only:", e)
+            self.state_file = None
+            return self._take_slot(kind)
+
+    def _take_slot(self, kind):
+        bucket = self.buckets[kind]
+        now = time.time()
+        bucket[0] = min(self.burst, bucket[0] + max(0.0, now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0
+        return (1 - bucket[0]) / self.rate
+
+
+class AdaptiveInterval:
+    """
+    Poll interval that follows registration activity. After a change the next POLL_FAST_COUNT polls
+    come after POLL_FAST, then every POLL_BASE; once nothing has changed for POLL_IDLE_AFTER the
+    interval doubles with every quiet poll, up to POLL_SLOW.
+    """
+
+    def __init__(self, fast=POLL_FAST, fast_count=POLL_FAST_COUNT, base=POLL_BASE,
+                 idle_after=POLL_IDLE_AFTER, slow=POLL_SLOW):
+        self.fast = fast
+        self.fast_count = fast_count
+        self.base = base
+        self.idle_after = idle_after
+        self.slow = slow
+        self.lock = threading.Lock()
+        self.current = base
+        self.fast_left = 0
+        self.last_change = time.monotonic()
+
+    def update(self, changed):
+        """Records the outcome of a poll; returns the seconds to wait before the next one."""
+        with self.lock:
+            now = time.monotonic()
+            if changed:
+                self.last_change = now
+                self.fast_left = self.fast_count
+            if self.fast_left > 0:
+                self.fast_left -= 1
+                self.current = self.base
+                return self.fast
+            if now - self.last_change < self.idle_after:
+                self.current = self.base
+            else:
+                self.current = min(self.slow, self.current * 2)
+            return self.current
+
+    def hurry(self):
+        """Someone is waiting for new data (e.g. Call Next found no token): poll fast again for a while."""
+        with self.lock:
+            self.last_change = time.monotonic()
+            self.fast_left = self.fast_count
+
+
+class CallCounter:
+    """
+    Sheets API requests per minute (reads, writes, retries), to see what polling costs: logged to the
+    console each minute, and per_minute() is shown in the POS upload status line.
+    """
+
+    KINDS = ("reads", "writes", "retries")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.minute = None
+        self.counts = dict.fromkeys(self.KINDS, 0)
+        self.last_minute = dict.fromkeys(self.KINDS, 0)
+
+    def count(self, kind):
+        minute = int(time.time() // 60)
+        with self.lock:
+            if minute != self.minute:
+                if self.minute is not None:
+                    self.last_minute = self.counts if minute == self.minute + 1 else dict.fromkeys(self.KINDS, 0)
+                    if CALL_LOG_MINUTES:
+                        stamp = datetime.fromtimestamp(self.minute * 60).strftime("%H:%M")
+                        print(f"Sheets API calls {stamp}: " + ", ".join(f"{n} {k}" for k, n in self.counts.items()))
+                self.minute = minute
+                self.counts = dict.fromkeys(self.KINDS, 0)
+            self.counts[kind] += 1
+
+    def per_minute(self):
+        """Counts for the last full minute (zeros if no call was made in it)."""
+        with self.lock:
+            if self.minute is not None and int(time.time() // 60) == self.minute + 1:
+                return dict(self.counts)
+            if self.minute is not None and int(time.time() // 60) == self.minute:
+                return dict(self.last_minute)
+            return dict.fromkeys(self.KINDS, 0)
+
+
+api_calls = CallCounter()  # every client of this process counts here
+
+
+class TabVersion:
+    """
+    Tells a reader whether a daily tab's rows need downloading, from the tab's sentinel cells.
+    check() reads the two cells; after the rows were downloaded, loaded() records that version.
+    fetch() does both for a range of the tab, and read() downloads the range with the cells in one request.
+    Tabs without the sentinel (made by an older POS) always need downloading.
+    """
+
+    def __init__(self, client, tab, recheck=SENTINEL_RECHECK):
+        self.client = client
+        self.tab = tab
+        self.recheck = recheck
+        self.version = None
+        self.seen = None
+        self.loaded_at = 0.0
+
+    def check(self):
+        """True if the rows changed since loaded() (raises SheetsError like any read; 400 = no such tab)."""
+        self._saw(self.client.get_values(f"{quote_tab(self.tab)}!{SENTINEL_CELLS}"))
+        if self.seen is None or self.seen != self.version:
+            return True
+        return time.monotonic() - self.loaded_at >= self.recheck
+
+    def read(self, range_name):
+        """The rows of range_name, read with the sentinel cells in one request (batchGet) and recorded as loaded."""
+        cells, rows = self.client.batch_get_values([f"{quote_tab(self.tab)}!{SENTINEL_CELLS}", range_name])
+        self._saw(cells)
+        self.loaded()
+        return rows
+
+    def fetch(self, range_name):
+        """
+        The rows of range_name if they changed since the last download, else None. While no version is
+        known (first download, or a tab without the sentinel) that is a single read(); after that, a
+        check() and the rows only when it says so.
+        """
+        if self.version is None:
+            return self.read(range_name)
+        if not self.check():
+            return None
+        rows = self.client.get_values(range_name)
+        self.loaded()
+        return rows
+
+    def _saw(self, values):
+        row = values[0] if values else []
+        self.seen = tuple(row[:2]) if len(row) >= 2 and row[1] else None
+
+    def loaded(self):
+        self.version = self.seen
+        self.loaded_at = time.monotonic()
+
+
+def read_sheet_id(path=SHEETS_ID_FILE):
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found. Create it and put the spreadsheet ID inside.")
+    with open(path, "r", encoding="utf-8") as f:
+        sheet_id = f.read().strip()
+    if not sheet_id:
+        raise ValueError(f"{path} is empty. Paste the spreadsheet ID inside.")
+    return sheet_id
+
+
+def quote_tab(title):
+    """A tab title as used in A1 ranges: 'Tab Name' (quotes inside the title doubled)."""
+    return "'" + title.replace("'", "''") + "'"
+
+
+def pad_rows(rows):
+    """Pads ragged rows with "" to the width of the widest row (the API drops trailing empty cells)."""
+    width = max((len(r) for r in rows), default=0)
+    return [r + [""] * (width - len(r)) for r in rows]
+
+
+class SheetsClient:
+    def __init__(self, sheet_id=None, service_account_file=SERVICE_ACCOUNT_FILE, readonly=False, limiter=None):
+        self.sheet_id = sheet_id or read_sheet_id()
+        self.limiter = limiter or get_limiter()
+        if not os.path.exists(service_account_file):
+            raise FileNotFoundError(f"{service_account_file} not found. Place your service account JSON file in the project folder.")
+        self.credentials = Credentials.from_service_account_file(
+            service_account_file, scopes=SCOPES_READONLY if readonly else SCOPES_READWRITE
+        )
+        self.session = AuthorizedSession(self.credentials)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, pool_block=True)
+        self.session.mount("https://", adapter)
+        # one token refresh at a time; the other threads reuse its result
+        self.auth_lock = threading.Lock()
+        self.auth_request = Request()
+        # one cached token per service account and access level
+        self.token_key = f"{self.credentials.service_account_email} {' '.join(self.credentials.scopes or [])}"
+        self.base_url = f"{API_ROOT}/{self.sheet_id}"
+
+    # --- reads ---
+    def get_values(self, range_name):
+        """Cell values of one A1 range as a list of rows (lists of strings, trailing empty cells dropped)."""
+        return self._request("GET", f"/values/{requests.utils.quote(range_name, safe='')}").get("values", [])
+
+    def batch_get_values(self, range_names):
+        """Cell values of several ranges in one request, in the same order as range_names (see TabVersion.read)."""
+        res = self._request("GET", "/values:batchGet", params=[("ranges", r) for r in range_names])
+        return [vr.get("values", []) for vr in res.get("valueRanges", [])]
+
+    def sheet_titles(self):
+        """Titles of all tabs (only the titles are requested, however many tabs there are)."""
+        res = self._request("GET", "", params={"fields": "sheets.properties.title"})
+        return [s.get("properties", {}).get("title") for s in res.get("sheets", [])]
+
+    # --- writes ---
+    def append_rows(self, range_name, rows, value_input="USER_ENTERED"):
+        """Appends rows after the last row of the table in range_name, in the order given."""
+        return self._request(
+            "POST", f"/values/{requests.utils.quote(range_name, safe='')}:append",
+            params={"valueInputOption": value_input, "insertDataOption": "INSERT_ROWS"},
+            json={"values": rows}
+        )
+
+    def update_values(self, range_name, rows, value_input="USER_ENTERED"):
+        return self._request(
+            "PUT", f"/values/{requests.utils.quote(range_name, safe='')}",
+            params={"valueInputOption": value_input},
+            json={"values": rows}
+        )
+
+    def clear_values(self, range_name):
+        return self._request("POST", f"/values/{requests.utils.quote(range_name, safe='')}:clear", json={}, idempotent=True)
+
+    def batch_update(self, requests_list):
+        """spreadsheets.batchUpdate (add tabs, formatting, ...); returns the API response."""
+        return self._request("POST", ":batchUpdate", json={"requests": requests_list})
+
+    def add_tab(self, title, rows=1000, columns=10):
+        self.batch_update([
+            {"addSheet": {"properties": {"title": title, "gridProperties": {"rowCount": rows, "columnCount": columns}}}}
+        ])
+
+    # --- plumbing ---
+    def _authorize(self):
+        with self.auth_lock:
+            if self.credentials.valid or self._load_cached_token():
+                return
+            try:
+                self.credentials.refresh(self.auth_request)
+            except Exception as e:
+                raise SheetsError(f"Could not authorize with Google: {e}")
+            self._save_cached_token()
+
+    def _read_token_cache(self):
+        try:
+            with open(TOKEN_CACHE_FILE, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+            return cache if isinstance(cache, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _load_cached_token(self):
+        if not TOKEN_CACHE_FILE:
+            return False
+        entry = self._read_token_cache().get(self.token_key)
+        try:
+            expiry = datetime.fromisoformat(entry["expiry"])  # naive UTC, as google-auth keeps it
+            token = entry["token"]
+        except (TypeError, KeyError, ValueError):
+            return False
+        if expiry - utcnow() < timedelta(seconds=TOKEN_MIN_LIFETIME):
+            return False
+        self.credentials.token = token
+        self.credentials.expiry = expiry
+        return True
+
+    def _save_cached_token(self):
+        if not TOKEN_CACHE_FILE or self.credentials.expiry is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(TOKEN_CACHE_FILE) or ".", exist_ok=True)
+            cache = self._read_token_cache()
+            now = utcnow().isoformat()
+            # drop tokens that have expired meanwhile
+            cache = {k: v for k, v in cache.items() if isinstance(v, dict) and v.get("expiry", "") > now}
+            cache[self.token_key] = {"token": self.credentials.token, "expiry": self.credentials.expiry.isoformat()}
+            atomic_write(TOKEN_CACHE_FILE, json.dumps(cache).encode("utf-8"), mode=0o600)
+        except OSError as e:
+            print("Could not save the Sheets token cache:", e)
+
+    def _request(self, method, path, idempotent=None, **kwargs):
+        """
+        Sends one API request through the rate limiter. 429s are retried; 5xx and network errors only
+        when the request is idempotent (reads, updates, clears), since a failed append may still have landed.
+        """
+        write = method != "GET"
+        if idempotent is None:
+            idempotent = method in ("GET", "PUT")
+        for attempt in range(MAX_RETRIES + 1):
+            if not self.limiter.acquire(write, None if write else READ_WAIT_MAX):
+                raise SheetsError("Google Sheets request limit reached; try again shortly.", 429)
+            self._authorize()
+            api_calls.count("writes" if write else "reads")
+            if attempt:
+                api_calls.count("retries")
+            retry_after = None
+            try:
+                res = self.session.request(method, self.base_url + path, timeout=TIMEOUT, **kwargs)
+            except requests.RequestException as e:
+                error = SheetsError(f"Google Sheets not reachable: {e}")
+            else:
+                if res.status_code < 400:
+                    return res.json() if res.content else {}
+                try:
+                    message = res.json()["error"]["message"]
+                except (ValueError, KeyError, TypeError):
+                    message = res.text[:200]
+                error = SheetsError(f"Google Sheets API error {res.status_code}: {message}", res.status_code)
+                retry_after = res.headers.get("Retry-After")
+
+            retry = error.status == 429 or (idempotent and (error.status is None or error.status in RETRY_STATUSES))
+            if not retry or attempt == MAX_RETRIES:
+                raise error
+            # exponential backoff with full jitter, so clients that failed together don't retry together
+            delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+            try:
+                delay = max(delay, float(retry_after))
+            except (TypeError, ValueError):
+                pass
+            print(f"{error} - retrying in {delay:.1f} s")
+            time.sleep(delay)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter():
+    """The process-wide rate limiter shared by every client."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
+
+
+def get_client(readonly=False):
+    """The process-wide client (one per access level), created on first use."""
+    with _clients_lock:
+        client = _clients.get(readonly)
+        if client is None:
+            client = SheetsClient(readonly=readonly)
+            _clients[readonly] = client
+        return client
@@ -0,0 +1,102 @@
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/.
+"""
+Startup benchmark for the apps: every run starts a fresh Python process and times
+  import  - loading the app script and everything it imports (its __main__ block is not run),
+  Tk()    - creating the root window,
+  idle    - the first root.update_idletasks(), i.e. the first layout pass.
+With --app the app's window is also built before the first update_idletasks(), as on a real start;
+that connects to Google Sheets, so it needs sheetsid.txt and service_account.json.
+
+    python startup_bench.py [--runs 5] [--app] [app script ...]
+
+Without a display (e.g. over SSH) Tk() can't run and only the import time is reported.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# app script -> class that builds its window (None: no Tk window)
+APPS = {
+    "Candidates POS.py": "InterviewCandidatePOS",
+    "Interview Room 1.py": "TokenCallerApp",
+    "Interview Room 2.py": "TokenCallerApp",
+    "Central Display.py": "CentralDisplayApp",
+    "Record Viewer.py": None,
+}
+
+
+def measure(script, build_app):
+    """Runs in the child process; returns the timings in milliseconds."""
+    result = {}
+    start = time.perf_counter()
+    spec = importlib.util.spec_from_file_location("app_under_test", os.path.join(HERE, script))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    result["import"] = (time.perf_counter() - start) * 1000
+    if APPS.get(script) is None:
+        return result
+
+    import tkinter as tk
+    start = time.perf_counter()
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        result["error"] = f"no display ({e})"
+        return result
+    result["tk"] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    if build_app:
+        getattr(module, APPS[script])(root)
+    root.update_idletasks()
+    result["idle"] = (time.perf_counter() - start) * 1000
+    root.destroy()
+    return result
+
+
+def run_child(script, build_app):
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", script] + (["--app"] if build_app else [])
+    proc = subprocess.run(cmd, cwd=HERE, capture_output=True, text=True)
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        error = (proc.stderr.strip().splitlines() or ["exit code %d" % proc.returncode])[-1]
+        return {"error": error}
+    return json.loads(lines[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time each app's imports, Tk() and first update_idletasks().")
+    parser.add_argument("scripts", nargs="*", help="app scripts to time (default: all)")
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per app (default 5); the median is shown")
+    parser.add_argument("--app", action="store_true", help="also build the app's window (connects to Google Sheets)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.app)))
+        return
+
+    print(f"{'app':<22}{'import':>10}{'Tk()':>10}{'idle':>10}   (median of {args.runs} runs, ms)")
+    for script in args.scripts or list(APPS):
+        runs = [run_child(script, args.app) for _ in range(args.runs)]
+        errors = [r["error"] for r in runs if "error" in r]
+        columns = []
+        for key in ("import", "tk", "idle"):
+            values = [r[key] for r in runs if key in r]
+            columns.append(f"{statistics.median(values):>10.0f}" if values else f"{'-':>10}")
+        line = f"{os.path.splitext(script)[0]:<22}{''.join(columns)}"
+        if errors:
+            line += f"   {errors[0]}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
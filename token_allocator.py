@@ -0,0 +1,182 @@
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/.
+"""
+Entry-number allocation shared by several registration desks (Candidates POS.py).
+
+Each desk leases a block of LEASE_SIZE consecutive entry numbers from a SQLite database
+(token_allocator.db, or the path written in allocator_path.txt) shared by the desks and hands them out locally, so only one write per block
+touches the shared file and two desks can never issue the same number. The database keeps SQLite's
+default rollback journal rather than WAL, because WAL does not work when the folder is a network share.
+
+A lease is released when the desk closes; the numbers it did not use are recorded as returned
+rather than handed out again, so entry numbers keep rising through the day. Leases that were never
+released (a desk crashed or was switched off) show up in the day-end report.
+
+Every reset of a day bumps that day's generation (table resets). A desk remembers the generation its
+lease was taken under and checks it now and then, so handing out a number never has to read the file.
+
+Command line:
+    python token_allocator.py report [YYYY-MM-DD]   leases per desk with issued and unused numbers
+    python token_allocator.py reset [YYYY-MM-DD]    start a day's numbering again from 1
+"""
+import argparse
+import sqlite3
+from datetime import datetime
+
+ALLOCATOR_FILE = "token_allocator.db"
+ALLOCATOR_PATH_FILE = "allocator_path.txt"  # optional: full path of the shared database (e.g. on a network share)
+LEASE_SIZE = 10  # entry numbers per lease
+
+
+def allocator_file():
+    """The allocator database every desk must use: the path in ALLOCATOR_PATH_FILE, else ALLOCATOR_FILE here."""
+    try:
+        with open(ALLOCATOR_PATH_FILE, "r", encoding="utf-8") as f:
+            path = f.read().strip()
+    except FileNotFoundError:
+        path = ""
+    return path or ALLOCATOR_FILE
+
+
+class TokenAllocator:
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS days (
+            day TEXT PRIMARY KEY,
+            next_entry INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS leases (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            day TEXT NOT NULL,
+            desk TEXT NOT NULL,
+            first_entry INTEGER NOT NULL,
+            last_entry INTEGER NOT NULL,
+            returned_from INTEGER,
+            leased_at TEXT NOT NULL,
+            released_at TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_leases_day ON leases (day, id);
+        CREATE TABLE IF NOT EXISTS resets (
+            day TEXT PRIMARY KEY,
+            generation INTEGER NOT NULL
+        );
+    """
+
+    def __init__(self, db_file=None):
+        self.db_file = db_file or allocator_file()
+        # autocommit mode; transactions are opened explicitly with BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+        self.conn.executescript(self.SCHEMA)
+
+    def lease(self, day, desk, size=LEASE_SIZE, floor=0):
+        """
+        Reserves the next size entry numbers of day for desk, all above floor.
+        Returns (lease id, first entry, last entry).
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute("SELECT next_entry FROM days WHERE day = ?", (day,)).fetchone()
+            first = max(row[0] if row else 1, floor + 1)
+            last = first + size - 1
+            self.conn.execute(
+                "INSERT INTO days (day, next_entry) VALUES (?, ?) "
+                "ON CONFLICT(day) DO UPDATE SET next_entry = excluded.next_entry",
+                (day, last + 1)
+            )
+            cur = self.conn.execute(
+                "INSERT INTO leases (day, desk, first_entry, last_entry, leased_at) VALUES (?, ?, ?, ?, ?)",
+                (day, desk, first, last, datetime.now().isoformat(timespec="seconds"))
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return cur.lastrowid, first, last
+
+    def day_started(self, day):
+        """True once any desk has leased numbers for day."""
+        return self.conn.execute("SELECT 1 FROM days WHERE day = ?", (day,)).fetchone() is not None
+
+    def generation(self, day):
+        """How many times day's numbering was reset; leases taken under an older generation are void."""
+        row = self.conn.execute("SELECT generation FROM resets WHERE day = ?", (day,)).fetchone()
+        return row[0] if row else 0
+
+    def is_issued(self, lease_id):
+        """True until the lease's day is reset, whether or not the lease was released."""
+        return self.conn.execute("SELECT 1 FROM leases WHERE id = ?", (lease_id,)).fetchone() is not None
+
+    def release(self, lease_id, next_unused):
+        """Returns the lease's numbers from next_unused on; they are reported, not issued again."""
+        self.conn.execute(
+            "UPDATE leases SET returned_from = CASE WHEN ? <= last_entry THEN ? END, released_at = ? "
+            "WHERE id = ? AND released_at IS NULL",
+            (next_unused, next_unused, datetime.now().isoformat(timespec="seconds"), lease_id)
+        )
+
+    def raise_floor(self, day, entry_no):
+        """Makes sure no lease of day starts at or below entry_no (e.g. numbers already in the sheet)."""
+        self.conn.execute(
+            "INSERT INTO days (day, next_entry) VALUES (?, ?) "
+            "ON CONFLICT(day) DO UPDATE SET next_entry = MAX(next_entry, excluded.next_entry)",
+            (day, entry_no + 1)
+        )
+
+    def reset_day(self, day):
+        """Starts day's numbering again from 1; every desk's current lease stops being valid."""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute("DELETE FROM leases WHERE day = ?", (day,))
+            self.conn.execute("DELETE FROM days WHERE day = ?", (day,))
+            self.conn.execute(
+                "INSERT INTO resets (day, generation) VALUES (?, 1) "
+                "ON CONFLICT(day) DO UPDATE SET generation = generation + 1",
+                (day,)
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def report(self, day):
+        """Leases of day as dicts, oldest first."""
+        rows = self.conn.execute(
+            "SELECT id, desk, first_entry, last_entry, returned_from, leased_at, released_at "
+            "FROM leases WHERE day = ? ORDER BY id", (day,)
+        ).fetchall()
+        keys = ("id", "desk", "first_entry", "last_entry", "returned_from", "leased_at", "released_at")
+        return [dict(zip(keys, row)) for row in rows]
+
+
+# --- Command line ---
+def main():
+    parser = argparse.ArgumentParser(description="Shared entry-number leases for the registration desks.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    report = sub.add_parser("report", help="show the leases of a day")
+    report.add_argument("day", nargs="?", default=datetime.now().strftime("%Y-%m-%d"))
+    reset = sub.add_parser("reset", help="start a day's numbering again from 1")
+    reset.add_argument("day", nargs="?", default=datetime.now().strftime("%Y-%m-%d"))
+    args = parser.parse_args()
+
+    allocator = TokenAllocator()
+    if args.command == "reset":
+        allocator.reset_day(args.day)
+        print(f"Entry numbers for {args.day} will start again from 1.")
+        return
+
+    leases = allocator.report(args.day)
+    if not leases:
+        print(f"No leases for {args.day}.")
+        return
+    for lease in leases:
+        if lease["released_at"] is None:
+            state = "still open (desk running, or it was not closed properly)"
+        elif lease["returned_from"] is None:
+            state = "fully used"
+        else:
+            state = f"returned {lease['returned_from']}-{lease['last_entry']} unused"
+        print(f"{lease['desk']:<12} {lease['first_entry']:>5}-{lease['last_entry']:<5} {state}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/.
+"""
+Today's token list for the Interview Room panels (Interview Room 1.py, Interview Room 2.py, ...).
+
+SheetsReader reads the daily tab written by Candidates POS.py through the shared read-only client.
+TokenPoller keeps the list up to date on a worker thread: it checks the tab's sentinel cells, downloads
+only the rows added since the last poll, and rebuilds the list when the rows were reset.
+"""
+import queue
+import threading
+from datetime import datetime
+
+from sheets_client import get_client, quote_tab, SheetsError, AdaptiveInterval, TabVersion
+
+
+# --- Sheets reader (read-only) ---
+class SheetsReader:
+    def __init__(self):
+        # the process-wide pooled client; raises if sheetsid.txt or service_account.json is missing
+        self.client = get_client(readonly=True)
+
+    def fetch_today_rows(self, sheet_name=None):
+        """
+        Fetch values from the spreadsheet.
+        Returns a list of rows (each row is a list of cell values).
+        By default reads from the first sheet range A:F for convenience.
+        If sheet_name provided, queries that tab: '{sheet_name}'!A:F
+        """
+        if sheet_name:
+            range_name = f"{quote_tab(sheet_name)}!A:F"
+        else:
+            range_name = "Sheet1!A:F"
+        # SheetsError (with the HTTP status) goes to the caller
+        return self.client.get_values(range_name)
+
+    def fetch_rows_from(self, sheet_name, start_row):
+        """
+        Fetch rows of '{sheet_name}'!A:F starting at the 1-based row start_row.
+        Used for incremental polling so only rows not yet ingested are downloaded.
+        """
+        range_name = f"{quote_tab(sheet_name)}!A{start_row}:F"
+        return self.client.get_values(range_name)
+
+    def tab_version(self, sheet_name):
+        """Sentinel-cell check for a daily tab, so unchanged tabs aren't downloaded (see TabVersion)."""
+        return TabVersion(self.client, sheet_name)
+
+# --- Background poller ---
+class TokenPoller(threading.Thread):
+    """
+    Polls the Google Sheet on a worker thread so a slow or hung API call never blocks the Tk loop.
+    Each time the token list changes a new list is put on self.snapshots for the UI thread to pick up.
+    A failed read leaves the last list in place and sets self.error (None again after the next good read).
+    The poll interval adapts (AdaptiveInterval): sub-second right after new rows, slowing to 30 s when idle.
+    """
+
+    def __init__(self, sheets, interval=None):
+        super().__init__(daemon=True)
+        self.sheets = sheets
+        self.interval = interval or AdaptiveInterval()
+        self.snapshots = queue.Queue()
+        self.paused = threading.Event()
+        self.wakeup = threading.Event()
+
+        self.token_data = []       # list of dicts: {"token","name","date","time"}
+        self.rows_ingested = 0     # sheet rows (incl. header) already parsed into token_data
+        self.last_row = None       # last parsed row, re-read as an anchor to detect resets
+        self.loaded_tab = None
+        self.tab_version = None    # sentinel check of loaded_tab
+        self.incremental_refresh = True
+        self.error = None          # message of the last failed read, shown by the control panel
+
+    def run(self):
+        while True:
+            changed = False
+            if not self.paused.is_set():
+                try:
+                    changed = self.load_new_tokens_from_sheets()
+                    if changed:
+                        # publish a copy; the poller keeps appending to its own list
+                        self.snapshots.put(list(self.token_data))
+                    self.error = None
+                except Exception as e:
+                    print("Error loading tokens:", e)
+                    self.error = str(e)
+            self.wakeup.wait(self.interval.update(changed))
+            self.wakeup.clear()
+
+    def poll_now(self):
+        self.wakeup.set()
+
+    def hurry(self):
+        """Polls right away and keeps polling fast for a moment (someone is waiting for a new token)."""
+        self.interval.hurry()
+        self.wakeup.set()
+
+    def load_tokens_from_sheets(self):
+        """
+        Loads token rows for today from the Google Sheet into self.token_data.
+        Returns True when token_data changed. Raises (leaving token_data as it was) if the
+        sheet could not be read; a missing tab only means no candidates yet.
+        Expected sheet columns (A-F): Date | Day | Time | Candidate Name | Contact Number | Entry No
+        """
+        if not self.sheets:
+            # Sheets reader not initialized
+            changed = bool(self.token_data)
+            self.token_data = []
+            return changed
+
+        # Use today's sheet tab name (YYYY-MM-DD). If that tab doesn't exist, try the default first sheet range.
+        today_tab = datetime.now().strftime("%Y-%m-%d")
+        loaded_tab = None
+        # Try reading the daily tab first (common setup where each day is a tab)
+        try:
+            rows = self.sheets.fetch_today_rows(sheet_name=today_tab)
+            loaded_tab = today_tab
+        except SheetsError as e_tab:
+            if e_tab.status != 400:
+                # quota, server or network trouble: keep the current list
+                raise
+            # daily tab doesn't exist (400 "Unable to parse range"): fall back to A:F of the first sheet
+            try:
+                rows = self.sheets.fetch_today_rows(sheet_name=None)
+            except SheetsError as e_default:
+                if e_default.status != 400:
+                    raise
+                rows = []
+
+        self.loaded_tab = loaded_tab
+        # remember how far we got so the next poll only asks for newer rows
+        self.rows_ingested = len(rows)
+        self.last_row = rows[-1] if rows else None
+
+        token_data = []
+        today = datetime.now().strftime("%Y-%m-%d")
+        # rows[0] is header; iterate from rows[1:] (no data or only header -> no tokens)
+        for r in rows[1:]:
+            token_info = self.parse_token_row(r, today)
+            if token_info:
+                token_data.append(token_info)
+        changed = token_data != self.token_data
+        self.token_data = token_data
+        return changed
+
+    def load_new_tokens_from_sheets(self):
+        """
+        Incremental variant of load_tokens_from_sheets.
+        First reads the tab's sentinel cells and stops there if they haven't moved. Otherwise
+        re-reads the last ingested row as an anchor plus everything after it. If the anchor
+        no longer matches (rows cleared by the POS "Reset Counter" or the sheet shrank),
+        falls back to a full rebuild.
+        """
+        today_tab = datetime.now().strftime("%Y-%m-%d")
+        if not self.sheets or not self.incremental_refresh or self.loaded_tab != today_tab or not self.rows_ingested:
+            return self.load_tokens_from_sheets()
+
+        if self.tab_version is None or self.tab_version.tab != today_tab:
+            self.tab_version = self.sheets.tab_version(today_tab)
+        try:
+            if not self.tab_version.check():
+                # same revision and row count as at the last download
+                return False
+            rows = self.sheets.fetch_rows_from(today_tab, self.rows_ingested)
+        except SheetsError as e:
+            if e.status != 400:
+                raise
+            # the tab went away (deleted or renamed) -> rebuild from scratch
+            return self.load_tokens_from_sheets()
+
+        if not rows or rows[0] != self.last_row:
+            # row count went down or rows were replaced -> rebuild from scratch
+            changed = self.load_tokens_from_sheets()
+            self.tab_version.loaded()
+            return changed
+
+        self.tab_version.loaded()
+        new_rows = rows[1:]
+        if not new_rows:
+            return False
+
+        self.rows_ingested += len(new_rows)
+        self.last_row = new_rows[-1]
+        for r in new_rows:
+            token_info = self.parse_token_row(r, today_tab)
+            if token_info:
+                self.token_data.append(token_info)
+        return True
+
+    def parse_token_row(self, r, today):
+        """Maps one sheet row to a token dict, or None if it is not a row for today."""
+        # ensure row has at least 6 columns safely
+        # A: Date (index 0), D: Name (3), F: Entry No (5), C: Time (2)
+        if len(r) >= 6:
+            date_val = r[0]
+            try:
+                if date_val == today:
+                    return {
+                        "token": r[5],
+                        "name": r[3],
+                        "date": date_val,
+                        "time": r[2] if len(r) > 2 else ""
+                    }
+            except Exception:
+                # ignore row if malformed
+                return None
+        else:
+            # row too short — try best-effort mapping if indices exist
+            if len(r) >= 1 and r[0] == today:
+                return {
+                    "token": r[5] if len(r) > 5 else (r[-1] if len(r) > 0 else ""),
+                    "name": r[3] if len(r) > 3 else "",
+                    "date": r[0],
+                    "time": r[2] if len(r) > 2 else ""
+                }
+        return None
@@ -0,0 +1,149 @@
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/.
+"""
+Load test for the Record Viewer's production server: requests/sec and latency percentiles with
+--clients concurrent keep-alive clients, for the page and the records API, with and without gzip.
+
+The viewer runs under waitress in a separate process, reading today's tab (--rows candidates) from
+fake_sheets.py, in a temporary folder. With --streams N that many browsers also keep a live-update
+stream open during the test (streams beyond the server's stream slots are turned away with 503).
+
+    python viewer_load_test.py [--clients 50] [--seconds 10] [--rows 300] [--threads 64] [--streams 0]
+"""
+import argparse
+import http.client
+import importlib.util
+import os
+import socket
+import tempfile
+import threading
+import time
+from datetime import datetime
+from multiprocessing import Process
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PORT = 8931
+
+PATHS = [("/", ""), ("/", "gzip"), ("/api/records", ""), ("/api/records", "gzip"),
+         ("/api/records?q=Candidate%2012", "gzip")]
+
+
+def serve_viewer(port, rows, threads, connections):
+    """Runs in the server process."""
+    import logging
+    import sys
+    sys.path.insert(0, HERE)
+    from fake_sheets import FakeSheets
+    os.chdir(tempfile.mkdtemp())
+    server = FakeSheets().start()
+    server.write_credentials(".")
+    server.use()
+    today = datetime.now().strftime("%Y-%m-%d")
+    server.tabs[today] = [["Date", "Day", "Time", "Candidate Name", "Contact Number", "Entry No", "", "1", "=COUNTA(A:A)"]] + [
+        [today, "Monday", "09:00:00", f"Candidate {n}", f"98765{n:05d}", str(n)] for n in range(1, rows + 1)
+    ]
+    spec = importlib.util.spec_from_file_location("record_viewer", os.path.join(HERE, "Record Viewer.py"))
+    viewer = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(viewer)
+    viewer.stream_slots = threading.BoundedSemaphore(max(1, threads - viewer.STREAM_THREAD_RESERVE))
+    from waitress import serve
+    logging.getLogger("waitress").setLevel(logging.ERROR)  # "Task queue depth" warnings are expected under load
+    serve(viewer.app, host="127.0.0.1", port=port, threads=threads, connection_limit=connections, _quiet=True)
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def open_stream(port):
+    """An idle browser tab: a live-update stream left open. Returns (socket, HTTP status)."""
+    s = socket.create_connection(("127.0.0.1", port))
+    s.sendall(b"GET /stream?notify=1 HTTP/1.1\r\nHost: localhost\r\n\r\n")
+    s.settimeout(10)
+    status = s.recv(4096).split(b"\r\n", 1)[0].split(b" ")[1].decode()
+    return s, status
+
+
+def load(port, path, encoding, clients, seconds):
+    latencies, sizes = [], []
+    lock = threading.Lock()
+    headers = {"Accept-Encoding": encoding} if encoding else {}
+    errors = [0]
+
+    def client():
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        mine, nbytes = [], []
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            start = time.perf_counter()
+            try:
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                with lock:
+                    errors[0] += 1
+                continue
+            mine.append(time.perf_counter() - start)
+            nbytes.append(len(body))
+        with lock:
+            latencies.extend(mine)
+            sizes.extend(nbytes)
+
+    workers = [threading.Thread(target=client) for _ in range(clients)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    latencies.sort()
+    n = len(latencies)
+    if not n:
+        print(f"{path:<32}{encoding or 'none':<6}no responses ({errors[0]} errors)")
+        return
+    print(f"{path:<32}{encoding or 'none':<6}{n / seconds:>8.0f} req/s  p50 {latencies[n // 2] * 1000:>6.1f} ms  "
+          f"p99 {latencies[min(n - 1, int(n * 0.99))] * 1000:>6.1f} ms  {sum(sizes) / n:>8.0f} B"
+          f"{f'  {errors[0]} errors' if errors[0] else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the Record Viewer against a local fake Sheets API.")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--rows", type=int, default=300, help="candidates in today's tab")
+    parser.add_argument("--threads", type=int, default=64, help="waitress worker threads")
+    parser.add_argument("--streams", type=int, default=0, help="live-update streams kept open during the test")
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args()
+
+    # waitress accepts 100 connections by default; leave room for every client and stream
+    connections = max(100, args.clients + args.streams + 10)
+    server = Process(target=serve_viewer, args=(args.port, args.rows, args.threads, connections), daemon=True)
+    server.start()
+    try:
+        if not wait_for_port(args.port):
+            raise SystemExit("The viewer did not start.")
+        streams = [open_stream(args.port) for _ in range(args.streams)]
+        if streams:
+            statuses = [status for _, status in streams]
+            print(f"{args.streams} streams open: {statuses.count('200')} accepted, {statuses.count('503')} turned away")
+        print(f"{args.clients} clients, {args.seconds:g} s per path, {args.rows} rows, {args.threads} threads")
+        for path, encoding in PATHS:
+            load(args.port, path, encoding, args.clients, args.seconds)
+        for s, _ in streams:
+            s.close()
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()